@@ -0,0 +1,94 @@
+"""
+Deploydan oldin bir marta ishga tushiriladigan buyruq: migratsiyalar va Telegram webhook.
+
+    python -m app.bootstrap
+
+Workerlar startupda DDL va tashqi so'rovlar bajarmaydi, shuning uchun bu buyruq
+gunicorn dan oldin ishga tushirilishi kerak (Dockerfile dagi CMD ga qarang).
+"""
+import asyncio
+import logging
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.bot import bot, set_command, WEBHOOK_URL
+from app.core.config import settings
+from app.database.models import Base
+from app.database.sqlite import install_sqlite_pragmas
+
+logger = logging.getLogger(__name__)
+
+# Alembicdan oldin jadvallar create_all bilan yaratilgan bazalar shu reviziyaga mos keladi
+BASELINE_REVISION = "ff6d52e36f12"
+
+
+def _create_engine():
+    # Har bir asyncio.run o'z event loopida ishlaydi - ulanishlar pool da saqlanmaydi
+    engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+    if engine.dialect.name == "sqlite":
+        install_sqlite_pragmas(engine.sync_engine)
+    return engine
+
+
+async def _schema_state() -> tuple[bool, bool]:
+    """:return: (alembic_version jadvali bormi, ilova jadvallari bormi)."""
+    engine = _create_engine()
+    try:
+        async with engine.connect() as conn:
+            tables = await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
+    finally:
+        await engine.dispose()
+    return "alembic_version" in tables, bool(tables & set(Base.metadata.tables))
+
+
+async def _create_schema() -> None:
+    engine = _create_engine()
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    finally:
+        await engine.dispose()
+
+
+def migrate() -> None:
+    config = Config("alembic.ini")
+    versioned, has_tables = asyncio.run(_schema_state())
+
+    if not versioned and not has_tables:
+        # Yangi baza: sxema modellardan to'liq yaratiladi, migratsiyalar o'tkazib yuboriladi
+        asyncio.run(_create_schema())
+        command.stamp(config, "head")
+        logger.info("Database schema created and stamped at head")
+        return
+
+    if not versioned:
+        command.stamp(config, BASELINE_REVISION)
+        logger.info(f"Existing schema stamped at {BASELINE_REVISION}")
+
+    command.upgrade(config, "head")
+    logger.info("Database migrated to head")
+
+
+async def register_webhook() -> None:
+    try:
+        webhook_info = await bot.get_webhook_info()
+        if webhook_info.url != WEBHOOK_URL:
+            await bot.set_webhook(url=WEBHOOK_URL)
+            logger.info("Webhook set successfully.")
+        await set_command()
+    finally:
+        await bot.session.close()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    migrate()
+    asyncio.run(register_webhook())
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,10 @@ from app.bot.register import register
 from app.core.config import settings
 
 bot = Bot(settings.BOT_TOKEN)
+
+# Webhook URL
+WEBHOOK_PATH = f"/bot/{settings.BOT_TOKEN}"
+WEBHOOK_URL = settings.WEBHOOK_URL + WEBHOOK_PATH
 dispatch = Dispatcher()
 set_update = dispatch._process_update
 
@@ -26,4 +30,5 @@ async def set_command():
         BotCommand(command="start", description="Bot ni ishga tushirish"),
         BotCommand(command="register", description="Ro'xatdan o'tish"),
         BotCommand(command="my_info", description="Ma'lumotlaringizni ko'rish"),
+        BotCommand(command="reset_password", description="Yangi parol o'rnatish"),
     ])
@@ -2,15 +2,18 @@ import logging
 import os
 
 from aiogram.fsm.context import FSMContext
-from aiogram.types import FSInputFile
+from aiogram.types import BufferedInputFile
 from aiogram.types import InputMediaPhoto
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 
 from app.bot import keyboards as kb
 from app.core.config import settings
-from app.database.base import get_session
-from app.database.models import Product, Order, OrderStatus, OrderItem, User
+from app.core.storage import media_storage
+from app.crud.catalogue import invalidate_catalogue
+from app.crud.order import merge_order_items, place_order
+from app.database.base import get_session, get_read_session
+from app.database.models import Product, Order, OrderItem, User
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -40,6 +43,11 @@ async def delete_image(path):
             os.remove(path)
 
 
+async def telegram_photo(path: str) -> BufferedInputFile:
+    # Rasm lokal diskda bo'lmasligi mumkin (S3) - baytlar media_storage orqali olinadi
+    return BufferedInputFile(await media_storage.read(path), filename=os.path.basename(path))
+
+
 def clean_string(value):
     if isinstance(value, str):
         return value.strip()
@@ -105,7 +113,7 @@ async def update_file_id_and_product(product_id: int, bot):
         if not product:
             raise ValueError("Product not found")
 
-        photo = FSInputFile(path=product.image)
+        photo = await telegram_photo(product.image)
 
         try:
             message = await bot.send_photo(chat_id=settings.OWNER_ID, photo=photo, caption="File id yangilandi !!!")
@@ -114,6 +122,7 @@ async def update_file_id_and_product(product_id: int, bot):
             product.telegram_file_id = new_file_id
             session.add(product)
             await session.commit()
+            await invalidate_catalogue()
 
             return new_file_id
         except Exception:
@@ -139,7 +148,7 @@ async def send_product(ikm, file_id, query=None, msg=None, msg_id=None, chat_id=
 
 
 async def send_order(current, chat_id, msg_id=None, msg=None, query=None):
-    async with get_session() as session:
+    async with get_read_session() as session:
         result = await session.execute(select(User).filter(User.chat_id == int(chat_id)))
         user = result.scalars().first()
 
@@ -183,7 +192,7 @@ async def send_order(current, chat_id, msg_id=None, msg=None, query=None):
 
 
 async def send_order_item(query, order_id, current, msg_id=None):
-    async with get_session() as session:
+    async with get_read_session() as session:
         result = await session.execute(
             select(OrderItem).options(selectinload(OrderItem.product)).filter(OrderItem.order_id == int(order_id))
         )
@@ -221,24 +230,11 @@ async def send_order_item(query, order_id, current, msg_id=None):
 
 
 async def create_order(user, cart):
-    total_price = await calculate_total(cart)
-
-    new_order = Order(user_id=user.id, total_price=total_price, status=OrderStatus.PENDING)
+    # REST API bilan bir xil yo'l: bitta tranzaksiya, ombor qoldig'i tekshiriladi,
+    # narxlar savatdan emas, bazadan olinadi
+    quantities = merge_order_items((int(item['id']), int(item['quantity'])) for item in cart)
 
     async with get_session() as session:
-        session.add(new_order)
-        await session.commit()
-
-        # Add order items
-        for item in cart:
-            order_item = OrderItem(
-                order_id=new_order.id,
-                product_id=item['id'],
-                quantity=item['quantity'],
-                price=item['price']
-            )
-            session.add(order_item)
-
-        await session.commit()
+        new_order = await place_order(session, user.id, quantities)
 
     return new_order
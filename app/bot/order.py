@@ -4,6 +4,7 @@ from aiogram import Router, F, Bot
 from aiogram.enums import ContentType
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
+from fastapi import HTTPException
 from sqlalchemy.future import select
 
 import app.bot.keyboards as kb
@@ -54,7 +55,11 @@ async def handle_confirmation_callback(query: CallbackQuery, state: FSMContext):
             )
             return
 
-        new_order = await create_order(user, cart)
+        try:
+            new_order = await create_order(user, cart)
+        except HTTPException as e:
+            await query.message.answer(text=f"Buyurtma yaratilmadi: {e.detail}", reply_markup=kb.main())
+            return
 
         await query.message.answer(
             text=f"Buyurtmangiz muvaffaqiyatli yaratildi. Buyurtma ID: {new_order.id}",
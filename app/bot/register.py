@@ -3,13 +3,14 @@ import re
 from aiogram import Router, types, F
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
-from psycopg2._psycopg import IntegrityError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
 
 from app.bot import helper
 from app.bot import keyboards as kb
-from app.bot.state import DeleteUserState, RegisterState
+from app.bot.state import DeleteUserState, RegisterState, ResetPasswordState
 from app.core.hashing import get_password_hash, verify_password
+from app.core.security import invalidate_user
 from app.database.base import get_session
 from app.database.models import User, Gender
 
@@ -115,13 +116,14 @@ async def edit(message: types.Message, state: FSMContext):
 async def save_to_database(message: types.Message, state: FSMContext):
     user_data = await state.get_data()
     try:
+        hashed_password = await get_password_hash(user_data.get('password'))
         new_user = User(
             chat_id=user_data.get('chat_id'),
             first_name=user_data.get('first_name'),
             last_name=user_data.get('last_name'),
             gender=Gender[user_data.get("gender")],
             phone_number=int(user_data.get('phone_number')),
-            hashed_password=get_password_hash(user_data.get('password'))
+            hashed_password=hashed_password
         )
         async with get_session() as session:
             session.add(new_user)
@@ -136,6 +138,48 @@ async def save_to_database(message: types.Message, state: FSMContext):
         await message.answer("Muvafaqiyatli ro'yxatdan o'tdingiz", reply_markup=kb.main())
 
 
+@register.message(StateFilter(None), Command("reset_password"))
+async def reset_password_handler(message: types.Message, state: FSMContext):
+    # Faqat paroli yaroqsiz deb belgilangan foydalanuvchilar uchun (password_reset_required migratsiyasi)
+    async with get_session() as session:
+        result = await session.execute(select(User).filter(User.chat_id == message.chat.id))
+        user = result.scalars().first()
+
+    if not user or not user.password_reset_required:
+        await message.answer("Parolni tiklash talab qilinmaydi", reply_markup=kb.main())
+        return
+
+    text = "Yangi parol kiriting. Eng kamida 6 belgi, katta va kichik harflar va raqam ishtirok etishi zarur"
+    await message.answer(text, reply_markup=kb.delete())
+    await state.set_state(ResetPasswordState.password)
+
+
+@register.message(ResetPasswordState.password, F.text, lambda message: re.match(password_regex, message.text))
+async def reset_password_save(message: types.Message, state: FSMContext):
+    await message.delete()
+    hashed_password = await get_password_hash(message.text)
+    async with get_session() as session:
+        result = await session.execute(select(User).filter(User.chat_id == message.chat.id))
+        user = result.scalars().first()
+        if user and user.password_reset_required:
+            user.hashed_password = hashed_password
+            user.password_reset_required = False
+            await session.commit()
+            invalidate_user(user.id)
+
+    await state.clear()
+    await message.answer("Yangi parol saqlandi, endi saytga kirishingiz mumkin", reply_markup=kb.main())
+
+
+@register.message(ResetPasswordState.password)
+async def reset_password_invalid(message: types.Message):
+    await message.delete()
+    await message.answer(
+        "Parolda katta harf, kichik harf, va raqam bo'lishi kerak. Eng kami 6 belgi. Iltimos, qaytadan kiriting.",
+        reply_markup=kb.delete()
+    )
+
+
 @register.callback_query(lambda query: query.data == "delete_user", StateFilter(None))
 async def delete_user_start(query: types.CallbackQuery, state: FSMContext):
     chat_id = query.from_user.id
@@ -173,13 +217,14 @@ async def delete_user_get_password(message: types.Message, state: FSMContext):
     user_data = await state.get_data()
     user = user_data.get("user")
 
-    if not verify_password(message.text, user.hashed_password):
+    if not await verify_password(message.text, user.hashed_password):
         await message.answer("Parol noto'g'ri")
     else:
         async with get_session() as session:
             try:
                 await session.delete(user)
                 await session.commit()
+                invalidate_user(user.id)
             except IntegrityError as e:
                 await message.answer(f"Database error: {e}", reply_markup=kb.main())
             except Exception as e:
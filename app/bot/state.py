@@ -10,6 +10,10 @@ class RegisterState(StatesGroup):
     confirmation = State()
 
 
+class ResetPasswordState(StatesGroup):
+    password = State()
+
+
 class DeleteUserState(StatesGroup):
     get_password = State()
     confirmation = State()
@@ -0,0 +1,63 @@
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.crud.catalogue import catalogue_version, catalogue_settled
+from app.utils import STOCK_FIELD
+
+
+def make_etag(version: int, suffix: str = "") -> str:
+    # suffix - bir resursning turli ko'rinishlari (masalan, gzip va br) uchun alohida kuchli ETag
+    return f'"{version:x}{suffix}"'
+
+
+def http_date(version: int) -> str:
+    return formatdate(version / 1_000_000_000, usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, version: int) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # GET uchun zaif taqqoslash: W/ prefiksi e'tiborga olinmaydi
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP sanalari soniya aniqligida
+        return int(version // 1_000_000_000) <= since
+
+    return False
+
+
+def conditional_headers(version: int, etag_suffix: str = "") -> dict:
+    return {
+        "ETag": make_etag(version, etag_suffix),
+        "Last-Modified": http_date(version),
+        "Cache-Control": "no-cache",
+    }
+
+
+async def catalogue_conditional(request: Request, response: Response) -> int:
+    """
+    Katalog endpointlari uchun dependency: ETag/Last-Modified ni qo'yadi va mijozdagi
+    nusxa joriy bo'lsa ma'lumotlar bazasiga murojaat qilmasdan 304 qaytaradi.
+    """
+    version = catalogue_version()
+    # Replika hali yangilanmagan bo'lishi mumkin, ombor qoldig'i esa katalog versiyasiga kirmaydi -
+    # bunday javoblar validatorlarsiz yuboriladi
+    if not catalogue_settled(version) or STOCK_FIELD in request.query_params.get("fields", ""):
+        response.headers["Cache-Control"] = "no-cache"
+        return version
+
+    headers = conditional_headers(version)
+
+    if is_not_modified(request, headers["ETag"], version):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return version
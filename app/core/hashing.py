@@ -1,18 +1,47 @@
-# from passlib.context import CryptContext
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
-# Parol uchun CryptContext konfiguratsiyasi
-# pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from passlib.context import CryptContext
 
-def get_password_hash(password: str) -> str:
+from app.core.config import settings
+
+# Parol uchun CryptContext konfiguratsiyasi. Rounds oshirilsa, eski hashlar login paytida qayta hashlanadi
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_HASH_ROUNDS,
+)
+
+# bcrypt GIL ni bo'shatadi, lekin har bir chaqiruv ~100-300ms oladi. Event loop bloklanmasligi uchun
+# hashlash alohida, cheklangan sondagi threadlarda bajariladi
+_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+async def _run(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, func, *args)
+
+
+def _verify_and_update(plain_password: str, hashed_password: Optional[str]) -> tuple[bool, Optional[str]]:
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except (TypeError, ValueError):
+        # Hash bo'sh yoki tanilmagan formatda
+        return False, None
+
+
+async def get_password_hash(password: str) -> str:
     """
     Berilgan parolni hash qilib qaytaradi.
 
     :param password: Hashlanishi kerak bo'lgan parol.
     :return: Hashlangan parol.
     """
-    return "pwd_context.hash(password)"
+    return await _run(pwd_context.hash, password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Berilgan parolning hashlangan parol bilan mosligini tekshiradi.
 
@@ -20,4 +49,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     :param hashed_password: Hashlangan parol.
     :return: Parol mos bo'lsa True, aks holda False.
     """
-    return "pwd_context.verify(plain_password, hashed_password)"
+    verified, _ = await _run(_verify_and_update, plain_password, hashed_password)
+    return verified
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """
+    Parolni tekshiradi va hash eskirgan bo'lsa (masalan, rounds oshirilgan), yangi hashni qaytaradi.
+
+    :param plain_password: Tekshirilishi kerak bo'lgan parol.
+    :param hashed_password: Hashlangan parol.
+    :return: (parol mosmi, yangi hash yoki None).
+    """
+    return await _run(_verify_and_update, plain_password, hashed_password)
@@ -0,0 +1,300 @@
+import asyncio
+import fcntl
+import logging
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Tinglovchi aloqasi uzilganda qayta ulanish oralig'i (soniya): har urinishda ikki barobar oshadi
+RECONNECT_DELAY = 0.5
+RECONNECT_DELAY_MAX = 30.0
+
+
+class InvalidationBackend(ABC):
+    """
+    Katalog versiyasini gunicorn workerlari o'rtasida ulashadi.
+
+    Versiya - katalog oxirgi marta o'zgargan vaqt (nanosekund). Har bir worker
+    o'z keshini `version()` bilan solishtiradi va farq bo'lsa keshni tozalaydi.
+    """
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    def version(self) -> int:
+        pass
+
+    @abstractmethod
+    async def bump(self) -> int:
+        pass
+
+    def _missed(self) -> None:
+        # Aloqa uzilgan paytdagi o'zgarishlar kelmagan bo'lishi mumkin - keshni majburan tozalaymiz
+        self._version = max(self._version + 1, time.time_ns())
+
+
+class LocalInvalidationBackend(InvalidationBackend):
+    """Bitta worker uchun: versiya faqat jarayon xotirasida saqlanadi."""
+
+    def __init__(self):
+        self._version = time.time_ns()
+
+    def version(self) -> int:
+        return self._version
+
+    async def bump(self) -> int:
+        self._version = max(self._version + 1, time.time_ns())
+        return self._version
+
+
+class FileInvalidationBackend(InvalidationBackend):
+    """
+    Bitta mashinadagi workerlar uchun: versiya umumiy faylda 8 baytli son sifatida turadi.
+
+    O'qish bitta `pread` - so'rov yo'lida qo'shimcha kechikish deyarli yo'q.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+        self._pid = None
+
+    def _file(self) -> int:
+        # preload_app bilan fork qilingan workerlar o'z deskriptorini ochadi
+        if self._fd is None or self._pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+    def _read(self, fd: int) -> int:
+        data = os.pread(fd, 8, 0)
+        return int.from_bytes(data, "big") if len(data) == 8 else 0
+
+    async def start(self) -> None:
+        fd = self._file()
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if self._read(fd) == 0:
+                os.pwrite(fd, time.time_ns().to_bytes(8, "big"), 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    async def stop(self) -> None:
+        if self._fd is not None and self._pid == os.getpid():
+            os.close(self._fd)
+        self._fd = None
+
+    def version(self) -> int:
+        return self._read(self._file())
+
+    async def bump(self) -> int:
+        fd = self._file()
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            version = max(self._read(fd) + 1, time.time_ns())
+            os.pwrite(fd, version.to_bytes(8, "big"), 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        return version
+
+
+# Versiyani oshirish va tarqatish bitta atomik amal: parallel bump lar bir-birini kamaytirib yubormaydi
+# va obunachilar versiyalarni kalitdagi tartibda oladi. Nanosekundlar Lua sonlariga (double) sig'maydi,
+# shuning uchun qiymatlar satr sifatida solishtiriladi, qo'shishni esa Redis ning INCR i bajaradi.
+_BUMP_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+local version = ARGV[1]
+if current and (#current > #version or (#current == #version and current >= version)) then
+    redis.call('INCR', KEYS[1])
+    version = redis.call('GET', KEYS[1])
+else
+    redis.call('SET', KEYS[1], version)
+end
+redis.call('PUBLISH', KEYS[1], version)
+return version
+"""
+
+
+class RedisInvalidationBackend(InvalidationBackend):
+    """Bir nechta mashina uchun: versiya Redis kalitida, o'zgarishlar pub/sub orqali tarqatiladi."""
+
+    def __init__(self, url: str, channel: str):
+        self.url = url
+        self.channel = channel
+        self._redis = None
+        self._bump = None
+        self._task = None
+        self._version = time.time_ns()
+
+    async def start(self) -> None:
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_BUS_BACKEND=redis uchun 'redis' paketini o'rnating")
+
+        self._redis = redis.from_url(self.url)
+        self._bump = self._redis.register_script(_BUMP_SCRIPT)
+        await self._sync()
+        self._task = asyncio.create_task(self._listen())
+
+    async def _sync(self) -> None:
+        # Umumiy versiya kalitda turadi - barcha workerlar bir xil versiya (va ETag) bilan ishlaydi
+        version = await self._redis.get(self.channel)
+        if version is None:
+            await self._redis.set(self.channel, self._version, nx=True)
+            version = await self._redis.get(self.channel)
+        self._version = int(version)
+
+    async def _listen(self) -> None:
+        delay = RECONNECT_DELAY
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                # Obuna bo'lingandan keyin o'qiladi: uzilish paytidagi o'zgarishlar shu yerda olinadi
+                await self._sync()
+                delay = RECONNECT_DELAY
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        # Kechikib kelgan eski xabar versiyani orqaga qaytarmasin
+                        self._version = max(self._version, int(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Invalidation listener disconnected, reconnecting in {delay}s: {e}")
+                self._missed()
+            finally:
+                await pubsub.aclose()
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+        if self._redis:
+            await self._redis.aclose()
+
+    def version(self) -> int:
+        return self._version
+
+    async def bump(self) -> int:
+        version = int(await self._bump(keys=[self.channel], args=[max(self._version + 1, time.time_ns())]))
+        self._version = max(self._version, version)
+        return self._version
+
+
+class PostgresInvalidationBackend(InvalidationBackend):
+    """
+    Postgres LISTEN/NOTIFY orqali tarqatish.
+
+    NOTIFY holatni saqlamaydi, shuning uchun versiya `cache_versions` jadvalida ham turadi:
+    yangi ishga tushgan yoki qayta ulangan worker uni o'sha yerdan oladi.
+    """
+
+    def __init__(self, dsn: str, channel: str):
+        self.dsn = dsn
+        self.channel = channel
+        self._conn = None
+        self._task = None
+        self._version = time.time_ns()
+
+    async def start(self) -> None:
+        try:
+            import asyncpg
+        except ImportError:
+            raise RuntimeError("CACHE_BUS_BACKEND=postgres uchun 'asyncpg' paketini o'rnating")
+
+        closed = await self._connect(asyncpg)
+        self._task = asyncio.create_task(self._listen(asyncpg, closed))
+
+    async def _connect(self, asyncpg) -> asyncio.Event:
+        closed = asyncio.Event()
+        conn = await asyncpg.connect(self.dsn)
+        try:
+            conn.add_termination_listener(lambda connection: closed.set())
+            await conn.add_listener(self.channel, self._on_notify)
+            # Tinglash boshlangandan keyin o'qiladi: orada kelgan NOTIFY yo'qolmaydi
+            await conn.execute(
+                "INSERT INTO cache_versions (name, version) VALUES ($1, $2) ON CONFLICT (name) DO NOTHING",
+                self.channel, self._version
+            )
+            self._version = await conn.fetchval("SELECT version FROM cache_versions WHERE name = $1", self.channel)
+        except Exception:
+            await conn.close()
+            raise
+        self._conn = conn
+        return closed
+
+    async def _listen(self, asyncpg, closed: asyncio.Event) -> None:
+        while True:
+            await closed.wait()
+            logger.error("Invalidation listener connection closed")
+            self._missed()
+
+            delay = RECONNECT_DELAY
+            while True:
+                await asyncio.sleep(delay)
+                try:
+                    closed = await self._connect(asyncpg)
+                    break
+                except Exception as e:
+                    logger.error(f"Invalidation listener reconnect failed, retrying in {delay}s: {e}")
+                    self._missed()
+                    delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self._version = max(self._version, int(payload))
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+        if self._conn:
+            await self._conn.close()
+
+    def version(self) -> int:
+        return self._version
+
+    async def bump(self) -> int:
+        # Versiya jadvalda oshiriladi va shu so'rovning o'zida boshqa workerlarga yuboriladi
+        version = await self._conn.fetchval(
+            """
+            WITH bumped AS (
+                INSERT INTO cache_versions (name, version) VALUES ($1, $2)
+                ON CONFLICT (name) DO UPDATE
+                SET version = GREATEST(cache_versions.version + 1, EXCLUDED.version)
+                RETURNING version
+            )
+            SELECT version, pg_notify($1, version::text) FROM bumped
+            """,
+            self.channel, max(self._version + 1, time.time_ns())
+        )
+        self._version = max(self._version, version)
+        return self._version
+
+
+def create_invalidation_backend() -> InvalidationBackend:
+    backend = settings.CACHE_BUS_BACKEND
+    if backend == "local":
+        return LocalInvalidationBackend()
+    if backend == "file":
+        path = settings.CACHE_BUS_PATH or os.path.join(tempfile.gettempdir(), "gusto-eats-catalogue.version")
+        return FileInvalidationBackend(path)
+    if backend == "redis":
+        return RedisInvalidationBackend(settings.REDIS_URL, settings.CACHE_BUS_CHANNEL)
+    if backend == "postgres":
+        dsn = f"postgresql://{settings.DB_USER}:{settings.DB_PASS}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
+        return PostgresInvalidationBackend(dsn, settings.CACHE_BUS_CHANNEL.replace(":", "_"))
+    raise ValueError(f"Noma'lum CACHE_BUS_BACKEND: {backend}")
+
+
+invalidation_bus = create_invalidation_backend()
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import random
+
+from app.core.config import settings
+from app.core.revocation import revocation_store
+from app.crud.user import purge_expired_tokens
+from app.database.base import get_session
+
+logger = logging.getLogger(__name__)
+
+_tasks: list[asyncio.Task] = []
+
+
+async def sync_revocations() -> None:
+    # Boshqa workerlarda qilingan logoutlarni qo'shish va muddati o'tganlarini xotiradan chiqarish
+    async with get_session() as session:
+        added = await revocation_store.sync(session)
+    purged = revocation_store.purge()
+    if added or purged:
+        logger.info(f"Revocation store: {added} added, {purged} expired, {len(revocation_store)} active")
+
+
+async def purge_blacklisted_tokens() -> int:
+    async with get_session() as session:
+        purged = await purge_expired_tokens(session, batch_size=settings.TOKEN_PURGE_BATCH_SIZE)
+    logger.info(f"Purged {purged} expired blacklisted tokens")
+    return purged
+
+
+async def _run_periodic(name: str, job, interval: float) -> None:
+    # Workerlar bir vaqtda ishga tushgani uchun ularning vazifalari tasodifiy siljish bilan boshlanadi
+    await asyncio.sleep(random.uniform(0, interval))
+    while True:
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Maintenance job {name} failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def start_maintenance() -> None:
+    async with get_session() as session:
+        loaded = await revocation_store.load(session)
+    logger.info(f"Revocation store loaded: {loaded} tokens")
+
+    _tasks.append(asyncio.create_task(
+        _run_periodic("sync_revocations", sync_revocations, settings.REVOCATION_SYNC_INTERVAL)
+    ))
+    _tasks.append(asyncio.create_task(
+        _run_periodic("purge_blacklisted_tokens", purge_blacklisted_tokens, settings.TOKEN_PURGE_INTERVAL)
+    ))
+
+
+async def stop_maintenance() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -0,0 +1,316 @@
+import mimetypes
+import os
+import re
+import stat
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+from urllib.parse import quote
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.storage import StorageBackend, media_storage
+
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/svg+xml", ".svg")
+
+# save_image fayllarni tarkibining sha256 hashi bilan nomlaydi: bunday fayl hech qachon o'zgarmaydi
+CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{64}(\.[a-z]+)?\.[a-z0-9]+$")
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 256 * 1024
+
+
+class _OpenFile:
+    """Keshdagi ochiq fayl. Fayl yuborilayotgan paytda keshdan chiqarilsa, u oxirgi so'rovdan keyin yopiladi."""
+
+    __slots__ = ("fd", "key", "refs", "evicted")
+
+    def __init__(self, fd: int, key: tuple):
+        self.fd = fd
+        self.key = key
+        self.refs = 0
+        self.evicted = False
+
+
+class MediaFiles:
+    """
+    /media uchun ASGI ilova: Range, If-None-Match/If-Modified-Since, uzoq muddatli kesh
+    sarlavhalari va ochiq fayl deskriptorlari keshi.
+
+    Fayl threadpool da `pread` bilan qismlarga bo'lib o'qiladi, fayl tizimiga har qanday
+    murojaat (realpath, stat, open) ham event loop dan tashqarida bajariladi. Baytlarni
+    ilova o'zi ko'chirmasligi uchun ikki yo'l bor:
+
+    - `accel_redirect` (MEDIA_ACCEL_REDIRECT) berilsa, sarlavhalar va 304 shu yerda hisoblanadi,
+      faylning o'zini (Range bilan) nginx sendfile orqali beradi::
+
+          location /_media/ {
+              internal;
+              alias /app/media/;
+              sendfile on;
+              tcp_nopush on;
+          }
+
+    - Server `http.response.pathsend` kengaytmasini qo'llasa, to'liq fayl javoblari
+      fayl yo'li bilan serverga topshiriladi va u sendfile dan foydalanadi.
+
+    Saqlovchi fayllarni o'zi bera olsa (S3), ilova baytlarni proksi qilmaydi - mijoz
+    imzolangan URL ga 307 bilan yo'naltiriladi.
+    """
+
+    def __init__(self, directory: str, cache_size: int, storage: Optional[StorageBackend] = None,
+                 accel_redirect: Optional[str] = None):
+        self.directory = os.path.realpath(directory)
+        # Saqlovchidagi kalitlar `save_image` qaytargan yo'l bilan bir xil: media/...
+        self.prefix = os.path.basename(self.directory)
+        self.cache_size = cache_size
+        self.storage = storage
+        self.accel_redirect = accel_redirect
+        self.hits = 0
+        self.misses = 0
+        self.redirects = 0
+        self.offloaded = 0
+        self._files: "OrderedDict[str, _OpenFile]" = OrderedDict()
+
+    def stats(self) -> dict:
+        return {"open_files": len(self._files), "maxsize": self.cache_size, "hits": self.hits, "misses": self.misses,
+                "redirects": self.redirects, "offloaded": self.offloaded}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+
+        if scope["method"] not in ("GET", "HEAD"):
+            await self._respond(send, 405, [(b"allow", b"GET, HEAD")])
+            return
+
+        relative = self._relative(scope)
+        if relative is None:
+            await self._respond(send, 404)
+            return
+
+        if self.storage is not None and self.storage.redirects:
+            await self._redirect(send, relative)
+            return
+
+        found = await run_in_threadpool(self._lookup, relative)
+        if found is None:
+            await self._respond(send, 404)
+            return
+        path, st = found
+
+        headers = self._headers(path, st)
+        request_headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        etag = headers["etag"]
+
+        if self._not_modified(request_headers, etag, st):
+            await self._respond(send, 304, [(name.encode(), value.encode()) for name, value in headers.items()
+                                            if name in ("etag", "last-modified", "cache-control")])
+            return
+
+        if self.accel_redirect and scope["method"] == "GET":
+            # Tana bo'sh: nginx uni internal location dagi fayl bilan almashtiradi va Range ni o'zi bajaradi
+            self.offloaded += 1
+            headers["x-accel-redirect"] = f"{self.accel_redirect}{quote(relative)}"
+            await self._respond(send, 200, [(name.encode(), value.encode()) for name, value in headers.items()])
+            return
+
+        start, end, status = 0, st.st_size - 1, 200
+        range_header = request_headers.get("range")
+        if range_header and st.st_size and request_headers.get("if-range", etag) in (etag, headers["last-modified"]):
+            byte_range = self._parse_range(range_header, st.st_size)
+            if byte_range is False:
+                await self._respond(send, 416, [(b"content-range", f"bytes */{st.st_size}".encode())])
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                status = 206
+                headers["content-range"] = f"bytes {start}-{end}/{st.st_size}"
+
+        count = end - start + 1 if st.st_size else 0
+        headers["content-length"] = str(count)
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(name.encode(), value.encode()) for name, value in headers.items()],
+        })
+
+        if scope["method"] == "HEAD" or count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if status == 200 and "http.response.pathsend" in scope.get("extensions", {}):
+            self.offloaded += 1
+            await send({"type": "http.response.pathsend", "path": path})
+            return
+
+        handle = await self._acquire(path, st)
+        try:
+            offset = start
+            remaining = count
+            while remaining:
+                chunk = await run_in_threadpool(os.pread, handle.fd, min(CHUNK_SIZE, remaining), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining:
+                # Fayl yuborish paytida qisqargan - javobni yopamiz
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            self._release(handle)
+
+    @staticmethod
+    def _relative(scope) -> Optional[str]:
+        route_path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and route_path.startswith(root_path):
+            route_path = route_path[len(root_path):]
+
+        relative = os.path.normpath(route_path.lstrip("/"))
+        if relative in (".", "") or relative.startswith(".."):
+            return None
+        return relative
+
+    def _lookup(self, relative: str) -> Optional[tuple[str, os.stat_result]]:
+        path = os.path.realpath(os.path.join(self.directory, relative))
+        if os.path.commonpath([path, self.directory]) != self.directory:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        return path, st
+
+    async def _redirect(self, send, relative: str) -> None:
+        location = await self.storage.url(f"{self.prefix}/{relative}")
+        self.redirects += 1
+        # URL imzosi muddati tugaguncha brauzer yo'naltirishni qayta so'ramaydi
+        max_age = max(self.storage.url_expires - 60, 0)
+        await self._respond(send, 307, [
+            (b"location", location.encode("latin-1")),
+            (b"cache-control", f"private, max-age={max_age}".encode()),
+        ])
+
+    @staticmethod
+    def _headers(path: str, st: os.stat_result) -> dict:
+        name = os.path.basename(path)
+        content_type, _ = mimetypes.guess_type(name)
+        headers = {
+            "content-type": content_type or "application/octet-stream",
+            "accept-ranges": "bytes",
+            "etag": f'"{st.st_mtime_ns:x}-{st.st_size:x}"',
+            "last-modified": formatdate(st.st_mtime, usegmt=True),
+            "x-content-type-options": "nosniff",
+        }
+        if CONTENT_ADDRESSED.match(name):
+            headers["etag"] = f'"{name}"'
+            headers["cache-control"] = f"public, max-age={settings.MEDIA_IMMUTABLE_MAX_AGE}, immutable"
+        else:
+            # Eski, nom bo'yicha saqlangan fayllar qayta yozilishi mumkin
+            headers["cache-control"] = f"public, max-age={settings.MEDIA_MAX_AGE}, must-revalidate"
+        if content_type == "image/svg+xml":
+            # Yuklangan SVG ichidagi skriptlar bajarilmasin
+            headers["content-security-policy"] = "default-src 'none'; style-src 'unsafe-inline'; sandbox"
+        return headers
+
+    @staticmethod
+    def _not_modified(request_headers: dict, etag: str, st: os.stat_result) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(st.st_mtime) <= since
+
+        return False
+
+    @staticmethod
+    def _parse_range(value: str, size: int):
+        """
+        :return: (start, end), bajarib bo'lmaydigan oraliq (fayl oxiridan keyin) uchun False,
+                 noto'g'ri yoki qo'llab-quvvatlanmaydigan (masalan, `bytes=5-3` yoki bir nechta
+                 oraliq) sarlavha uchun None - RFC 9110 bo'yicha e'tiborsiz qoldirilib, to'liq fayl yuboriladi.
+        """
+        match = RANGE.match(value.strip())
+        if not match:
+            return None
+
+        first, last = match.groups()
+        if not first and not last:
+            return None
+        if not first:
+            length = int(last)
+            if length == 0:
+                return False
+            return max(size - length, 0), size - 1
+
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start >= size:
+            return False
+        end = min(int(last), size - 1) if last else size - 1
+        return start, end
+
+    async def _acquire(self, path: str, st: os.stat_result) -> _OpenFile:
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        handle = self._files.get(path)
+        if handle is not None and handle.key == key:
+            self._files.move_to_end(path)
+            self.hits += 1
+        else:
+            self.misses += 1
+            if handle is not None:
+                # Fayl almashtirilgan - eski deskriptor bo'shatiladi
+                self._evict(path)
+            fd = await run_in_threadpool(os.open, path, os.O_RDONLY)
+            handle = self._files.get(path)
+            if handle is not None and handle.key == key:
+                # Shu orada boshqa so'rov ham ochib qo'ygan
+                os.close(fd)
+            else:
+                if handle is not None:
+                    self._evict(path)
+                handle = _OpenFile(fd, key)
+                self._files[path] = handle
+                while len(self._files) > self.cache_size:
+                    self._evict(next(iter(self._files)))
+
+        handle.refs += 1
+        return handle
+
+    def _evict(self, path: str) -> None:
+        handle = self._files.pop(path)
+        handle.evicted = True
+        if handle.refs == 0:
+            os.close(handle.fd)
+
+    @staticmethod
+    def _release(handle: _OpenFile) -> None:
+        handle.refs -= 1
+        if handle.evicted and handle.refs == 0:
+            os.close(handle.fd)
+
+    @staticmethod
+    async def _respond(send, status: int, headers: list = ()) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-length", b"0"), *headers],
+        })
+        await send({"type": "http.response.body", "body": b""})
+
+
+media_files = MediaFiles(directory="media", cache_size=settings.MEDIA_FD_CACHE_SIZE, storage=media_storage,
+                         accel_redirect=settings.MEDIA_ACCEL_REDIRECT)
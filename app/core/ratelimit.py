@@ -0,0 +1,292 @@
+import ipaddress
+import json
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitBackend(ABC):
+    """
+    Token bucket saqlovchisi.
+
+    Har bir kalit uchun `capacity` ta token bor, ular soniyasiga `rate` tezlikda
+    to'ladi. `take()` bitta token oladi va 0 qaytaradi, token bo'lmasa - keyingi
+    token paydo bo'lguncha qolgan soniyalarni.
+    """
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Jarayon xotirasidagi bucketlar. Har bir gunicorn worker o'z hisobini yuritadi,
+    shuning uchun umumiy chegara taxminan `workers * capacity` bo'ladi.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            # Eng uzoq murojaat qilinmagan bucket to'lgan bo'lishi ehtimoli katta
+            self._buckets.popitem(last=False)
+        return wait
+
+
+# Bucketni o'qish, to'ldirish va token olish bitta atomik amalda bajariladi.
+# Vaqt Redis serveridan olinadi - workerlar soatlari farqi ta'sir qilmaydi.
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Bir nechta worker va mashinalar uchun umumiy bucketlar."""
+
+    def __init__(self, url: str, prefix: str):
+        self.url = url
+        self.prefix = prefix
+        self._redis = None
+        self._take = None
+
+    async def start(self) -> None:
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis uchun 'redis' paketini o'rnating")
+
+        self._redis = redis.from_url(self.url)
+        self._take = self._redis.register_script(_TAKE_SCRIPT)
+
+    async def stop(self) -> None:
+        if self._redis:
+            await self._redis.aclose()
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        wait = await self._take(keys=[f"{self.prefix}:{key}"], args=[capacity, rate])
+        return float(wait)
+
+
+def create_rate_limit_backend() -> RateLimitBackend:
+    backend = settings.RATE_LIMIT_BACKEND
+    if backend == "memory":
+        return MemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+    if backend == "redis":
+        return RedisRateLimitBackend(settings.REDIS_URL, settings.RATE_LIMIT_PREFIX)
+    raise ValueError(f"Noma'lum RATE_LIMIT_BACKEND: {backend}")
+
+
+rate_limit_backend = create_rate_limit_backend()
+
+_stats = {"allowed": 0, "rejected": 0}
+
+
+def rate_limit_stats() -> dict:
+    return dict(_stats)
+
+
+class RateLimitMiddleware:
+    """
+    Login va ro'yxatdan o'tish so'rovlarini router, DB va bcrypt ishidan oldin cheklaydi.
+
+    Ikki bucket tekshiriladi: mijoz IP manzili va so'rov tanasidagi telefon raqami.
+    Biri bo'sh bo'lsa 429 va `Retry-After` qaytariladi. Tana o'qilgandan keyin
+    ilovaga qayta uzatiladi. RATE_LIMIT_MAX_BODY dan katta tana 413, JSON bo'lmagan
+    tana 400 bilan rad etiladi - aks holda telefon chegarasini chetlab o'tish mumkin edi.
+
+    So'rov TRUSTED_PROXIES dagi manzildan (nginx va h.k.) kelsa, mijoz IP si
+    `X-Forwarded-For` dan olinadi; boshqa manzillardan kelgan sarlavha e'tiborsiz qoldiriladi.
+    """
+
+    def __init__(self, app, paths: tuple[str, ...] = ("/auth/login", "/auth/register"),
+                 backend: Optional[RateLimitBackend] = None, trusted_proxies: Optional[list[str]] = None):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.backend = backend or rate_limit_backend
+        if trusted_proxies is None:
+            trusted_proxies = settings.TRUSTED_PROXIES
+        self.trusted_proxies = [ipaddress.ip_network(proxy, strict=False) for proxy in trusted_proxies]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        ip_key = f"ip:{self._client_ip(scope)}"
+        if not await self._take(scope, send, ip_key, settings.RATE_LIMIT_IP_BURST,
+                                settings.RATE_LIMIT_IP_PER_MINUTE / 60):
+            return
+
+        if self._content_length(scope) > settings.RATE_LIMIT_MAX_BODY:
+            await self._reject(send, 413, "So'rov hajmi juda katta")
+            return
+        body, messages = await self._read_body(receive)
+        if len(body) > settings.RATE_LIMIT_MAX_BODY:
+            await self._reject(send, 413, "So'rov hajmi juda katta")
+            return
+        try:
+            data = json.loads(body)
+        except ValueError:
+            await self._reject(send, 400, "So'rov tanasi JSON formatida bo'lishi kerak")
+            return
+
+        phone_number = self._phone_number(data)
+        if phone_number is not None:
+            if not await self._take(scope, send, f"phone:{phone_number}", settings.RATE_LIMIT_PHONE_BURST,
+                                    settings.RATE_LIMIT_PHONE_PER_MINUTE / 60):
+                return
+
+        _stats["allowed"] += 1
+        await self.app(scope, self._replay(messages, receive), send)
+
+    async def _take(self, scope, send, key: str, capacity: int, rate: float) -> bool:
+        wait = await self.backend.take(key, capacity, rate)
+        if wait <= 0:
+            return True
+        _stats["rejected"] += 1
+        logger.warning(f"Rate limit exceeded for {key} on {scope['path']}")
+        await self._reject(send, 429, "Urinishlar soni juda ko'p, birozdan keyin qayta urinib ko'ring",
+                           [(b"retry-after", str(math.ceil(wait)).encode())])
+        return False
+
+    def _trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address.strip())
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+    def _client_ip(self, scope) -> str:
+        client = scope.get("client")
+        address = client[0] if client else "unknown"
+        if not self.trusted_proxies or not self._trusted(address):
+            return address
+
+        forwarded = [value.decode("latin-1") for name, value in scope["headers"] if name == b"x-forwarded-for"]
+        hops = [hop.strip() for value in forwarded for hop in value.split(",") if hop.strip()]
+        # O'ngdan chapga: ishonchli proksilar o'tkazib yuboriladi, birinchi boshqa manzil - mijoz.
+        # Chapdagi qiymatlarni mijozning o'zi yozgan bo'lishi mumkin, shuning uchun ular o'qilmaydi
+        for hop in reversed(hops):
+            if not self._trusted(hop):
+                return hop
+        return hops[0] if hops else address
+
+    @staticmethod
+    def _content_length(scope) -> int:
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    return int(value)
+                except ValueError:
+                    return 0
+        return 0
+
+    @staticmethod
+    async def _read_body(receive) -> tuple[bytes, list]:
+        messages = []
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            chunk = message.get("body", b"")
+            chunks.append(chunk)
+            size += len(chunk)
+            if not message.get("more_body", False) or size > settings.RATE_LIMIT_MAX_BODY:
+                break
+        return b"".join(chunks), messages
+
+    @staticmethod
+    def _phone_number(data) -> Optional[int]:
+        """
+        Telefon raqamini UserLogin/UserCreate dagi `int` maydon kabi normallashtiradi:
+        998901234567, 998901234567.0, " 998901234567 " va "0998901234567" bitta kalitga tushadi.
+        Schema rad etadigan qiymat uchun None - bunday so'rov bazagacha yetmaydi.
+        """
+        if not isinstance(data, dict):
+            return None
+        phone_number = data.get("phone_number")
+        if isinstance(phone_number, bool):
+            return int(phone_number)
+        if isinstance(phone_number, int):
+            return phone_number
+        if isinstance(phone_number, str):
+            phone_number = phone_number.strip()
+            try:
+                return int(phone_number)
+            except ValueError:
+                try:
+                    phone_number = float(phone_number)
+                except ValueError:
+                    return None
+        if isinstance(phone_number, float) and phone_number.is_integer():
+            return int(phone_number)
+        return None
+
+    @staticmethod
+    def _replay(messages: list, receive):
+        async def replay():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+
+        return replay
+
+    @staticmethod
+    async def _reject(send, status: int, detail: str, headers: Optional[list] = None) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *(headers or []),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,88 @@
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.database.models import BlacklistedToken
+
+
+def token_id(payload: dict, token: str) -> str:
+    # jti bo'lmagan eski tokenlar uchun tokenning o'z hashi ishlatiladi
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+
+class RevocationStore:
+    """
+    Bekor qilingan tokenlar (jti -> tugash vaqti) xotirada saqlanadi.
+
+    Har bir so'rovdagi tekshiruv - bitta dict qidiruvi. To'plam faqat hali amal qilayotgan
+    tokenlarni saqlaydi, shuning uchun hajmi muddat ichidagi logoutlar soni bilan chegaralangan.
+    Boshqa workerlarda qilingan logoutlar `sync()` orqali fon vazifasida qo'shiladi.
+    """
+
+    # Boshqa workerlarda hali commit bo'lmagan yozuvlarni o'tkazib yubormaslik uchun oynalar ustma-ust olinadi
+    SYNC_OVERLAP = timedelta(seconds=60)
+
+    def __init__(self):
+        self._revoked: dict[str, float] = {}
+        self._synced_at: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def add(self, jti: str, expires_at: float) -> None:
+        self._revoked[jti] = expires_at
+
+    def purge(self) -> int:
+        now = time.time()
+        expired = [jti for jti, expires_at in self._revoked.items() if expires_at <= now]
+        for jti in expired:
+            del self._revoked[jti]
+        return len(expired)
+
+    def _expires_at(self, row: BlacklistedToken) -> float:
+        # Ustunlarda UTC vaqti timezone siz saqlanadi
+        if row.expires_at is not None:
+            return row.expires_at.replace(tzinfo=timezone.utc).timestamp()
+        # expires_at yozilmagan eski qatorlar: token muddati qora ro'yxatga qo'shilgan vaqtdan hisoblanadi
+        blacklisted_on = row.blacklisted_on or datetime.utcnow()
+        expires_at = blacklisted_on + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        return expires_at.replace(tzinfo=timezone.utc).timestamp()
+
+    async def sync(self, db: AsyncSession) -> int:
+        """Oxirgi sinxronizatsiyadan keyin qo'shilgan, hali amal qilayotgan yozuvlarni yuklaydi."""
+        now = datetime.utcnow()
+        stmt = select(BlacklistedToken).where(
+            or_(BlacklistedToken.expires_at.is_(None), BlacklistedToken.expires_at > now)
+        )
+        if self._synced_at is not None:
+            stmt = stmt.where(BlacklistedToken.blacklisted_on >= self._synced_at - self.SYNC_OVERLAP)
+
+        result = await db.execute(stmt)
+        added = 0
+        for row in result.scalars():
+            jti = row.jti or hashlib.sha256(row.token.encode()).hexdigest()
+            if jti not in self._revoked:
+                added += 1
+            self.add(jti, self._expires_at(row))
+
+        self._synced_at = now
+        return added
+
+    async def load(self, db: AsyncSession) -> int:
+        self._revoked.clear()
+        self._synced_at = None
+        loaded = await self.sync(db)
+        self.purge()
+        return loaded
+
+
+revocation_store = RevocationStore()
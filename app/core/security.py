@@ -1,77 +1,113 @@
+import time
+import uuid
 from datetime import datetime, timedelta
 
-from jose import JWTError, jwt
+from jose import ExpiredSignatureError, JWTError, jwt
 from sqlalchemy.future import select
-from jwt import ExpiredSignatureError
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
 
-from app.schemas import TokenData
+from app.schemas import TokenData, UserResponse
 from app.core.config import settings
+from app.core.revocation import revocation_store, token_id
 from app.database.base import get_async_session
-from app.database.models import User, BlacklistedToken
+from app.database.models import User
+from app.utils.cache import TTLCache, MISSING
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# token -> (foydalanuvchi nusxasi, token tugash vaqti, jti). Autentifikatsiya qilingan so'rovlar
+# keshdan o'qiladi; har bir worker o'z keshiga ega, shuning uchun TTL qisqa bo'lishi kerak.
+_user_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
-async def verify_access_token(token: str, credentials_exception: HTTPException, db: AsyncSession):
+def decode_access_token(token: str, credentials_exception: HTTPException) -> dict:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY,
-                             algorithms=[settings.ALGORITHM])
-        phone_number: str = payload.get("phone_number")
-        if phone_number is None:
-            raise credentials_exception
-
-        blacklisted_token = await db.execute(select(BlacklistedToken).where(BlacklistedToken.token == token))
-        if blacklisted_token.scalar():
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
-                                detail="Token has been invalidated", headers={"WWW-Authenticate": "Bearer"})
-
-        expire_time = datetime.utcfromtimestamp(payload.get("exp"))
-        token_data = TokenData(phone_number=phone_number)
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail="Token has expired", headers={"WWW-Authenticate": "Bearer"})
     except JWTError:
         raise credentials_exception
 
+    if payload.get("phone_number") is None:
+        raise credentials_exception
+    return payload
+
+
+async def verify_access_token(token: str, credentials_exception: HTTPException, db: AsyncSession):
+    payload = decode_access_token(token, credentials_exception)
+    jti = token_id(payload, token)
+
+    if revocation_store.is_revoked(jti):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                            detail="Token has been invalidated", headers={"WWW-Authenticate": "Bearer"})
+
+    expire_time = datetime.utcfromtimestamp(payload.get("exp"))
+    token_data = TokenData(phone_number=payload.get("phone_number"), jti=jti)
     return token_data, expire_time
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_session)):
+def invalidate_token(token: str) -> None:
+    _user_cache.pop(token)
+
+
+def invalidate_user(user_id: int) -> None:
+    _user_cache.evict(lambda _, cached: cached[0].id == user_id)
+
+
+def auth_cache_stats() -> dict:
+    return _user_cache.stats()
+
+
+async def get_current_user(
+        token: str = Depends(oauth2_scheme),
+        db: AsyncSession = Depends(get_async_session)
+) -> UserResponse:
+    blacklisted_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token has been blacklisted",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    cached = _user_cache.get(token)
+    if cached is not MISSING:
+        user, expire, jti = cached
+        if revocation_store.is_revoked(jti):
+            _user_cache.pop(token)
+            raise blacklisted_exception
+        if expire is None or expire > time.time():
+            return user
+        _user_cache.pop(token)
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    blacklisted_token = await db.execute(select(BlacklistedToken).where(BlacklistedToken.token == token))
-    if blacklisted_token.scalar():
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has been blacklisted",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    try:
-        payload = jwt.decode(token=token, key=settings.SECRET_KEY, algorithms=[
-                             settings.ALGORITHM])
-        phone_number: str = payload.get("phone_number")
-        if phone_number is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    user = await db.execute(select(User).where(User.phone_number == phone_number))
+    payload = decode_access_token(token, credentials_exception)
+    jti = token_id(payload, token)
+    if revocation_store.is_revoked(jti):
+        raise blacklisted_exception
+
+    user = await db.execute(select(User).where(User.phone_number == payload.get("phone_number")))
     user = user.scalar_one_or_none()
     if user is None:
         raise credentials_exception
+
+    user = UserResponse.model_validate(user)
+    # Sessiya route bilan umumiy: o'qish tranzaksiyasi yopiladi, route `begin_write` bilan yozishni boshlay oladi
+    await db.rollback()
+    _user_cache.set(token, (user, payload.get("exp"), jti))
     return user
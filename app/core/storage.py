@@ -0,0 +1,251 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+IMMUTABLE_CACHE_CONTROL = f"public, max-age={settings.MEDIA_IMMUTABLE_MAX_AGE}, immutable"
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+class StorageBackend(ABC):
+    """
+    Media fayllar saqlovchisi.
+
+    Fayllar bazada saqlanadigan yo'l bilan aniqlanadi (masalan, `media/product/<sha256>.jpg`):
+    lokal backendda bu fayl tizimidagi yo'l, S3 da obyekt kaliti. Hash bilan nomlangan
+    fayllar o'zgarmaydi, shuning uchun mavjud faylni qayta yuklash shart emas.
+    """
+
+    # True bo'lsa /media so'rovlari fayl baytlarini proksi qilmasdan `url()` ga yo'naltiriladi
+    redirects = False
+    # `url()` qaytargan manzil amal qilish muddati (soniya), 0 - cheklanmagan
+    url_expires = 0
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    async def store_file(self, temp_path: str, location: str, content_type: str) -> None:
+        """Vaqtinchalik faylni `location` ga ko'chiradi; `temp_path` har qanday holatda o'chiriladi."""
+
+    @abstractmethod
+    async def write(self, location: str, data: bytes, content_type: str) -> None:
+        pass
+
+    @abstractmethod
+    async def read(self, location: str) -> bytes:
+        pass
+
+    @abstractmethod
+    async def delete(self, locations: Iterable[str]) -> None:
+        pass
+
+    async def url(self, location: str) -> str:
+        return f"/{location}"
+
+
+class LocalStorageBackend(StorageBackend):
+    """Bitta server uchun: fayllar lokal diskda, /media orqali shu ilovaning o'zi beradi."""
+
+    @staticmethod
+    def _store(temp_path: str, location: str) -> None:
+        if os.path.exists(location):
+            # Xuddi shu rasm allaqachon saqlangan - ikkinchi nusxa kerak emas
+            _remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(location), exist_ok=True)
+            os.replace(temp_path, location)
+
+    @staticmethod
+    def _write(location: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(location), exist_ok=True)
+        temp_path = f"{location}.part"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, location)
+
+    @staticmethod
+    def _delete(locations: Iterable[str]) -> None:
+        for location in locations:
+            _remove(location)
+
+    async def store_file(self, temp_path: str, location: str, content_type: str) -> None:
+        try:
+            await run_in_threadpool(self._store, temp_path, location)
+        except Exception:
+            await run_in_threadpool(_remove, temp_path)
+            raise
+
+    async def write(self, location: str, data: bytes, content_type: str) -> None:
+        await run_in_threadpool(self._write, location, data)
+
+    async def read(self, location: str) -> bytes:
+        return await run_in_threadpool(_read, location)
+
+    async def delete(self, locations: Iterable[str]) -> None:
+        await run_in_threadpool(self._delete, list(locations))
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    S3 yoki unga mos saqlovchi (MinIO va h.k.) - bir nechta replika bitta bucketdan foydalanadi.
+
+    Katta fayllar multipart bilan qismlarga bo'lib yuklanadi, mijozlar esa obyektni
+    vaqtinchalik imzolangan URL orqali to'g'ridan-to'g'ri bucketdan oladi.
+    """
+
+    redirects = True
+
+    def __init__(self, bucket: str, endpoint_url: str = None, region: str = None, access_key_id: str = None,
+                 secret_access_key: str = None, path_style: bool = False, part_size: int = 8 * 1024 * 1024,
+                 url_expires: int = 3600):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.path_style = path_style
+        self.part_size = part_size
+        self.url_expires = url_expires
+        self._client_context = None
+        self._client = None
+        self._client_error = None
+
+    async def start(self) -> None:
+        try:
+            from aiobotocore.config import AioConfig
+            from aiobotocore.session import get_session
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise RuntimeError("MEDIA_STORAGE=s3 uchun 'aiobotocore' paketini o'rnating")
+
+        config = AioConfig(s3={"addressing_style": "path" if self.path_style else "auto"})
+        self._client_context = get_session().create_client(
+            "s3",
+            endpoint_url=self.endpoint_url,
+            region_name=self.region,
+            aws_access_key_id=self.access_key_id,
+            aws_secret_access_key=self.secret_access_key,
+            config=config,
+        )
+        self._client = await self._client_context.__aenter__()
+        self._client_error = ClientError
+
+    async def stop(self) -> None:
+        if self._client_context is not None:
+            await self._client_context.__aexit__(None, None, None)
+        self._client_context = None
+        self._client = None
+
+    async def _exists(self, location: str) -> bool:
+        try:
+            await self._client.head_object(Bucket=self.bucket, Key=location)
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    async def _upload_parts(self, file, location: str, content_type: str) -> None:
+        upload = await self._client.create_multipart_upload(
+            Bucket=self.bucket, Key=location, ContentType=content_type, CacheControl=IMMUTABLE_CACHE_CONTROL
+        )
+        upload_id = upload["UploadId"]
+        parts = []
+        try:
+            while True:
+                # Xotirada bir vaqtda faqat bitta qism turadi
+                chunk = await run_in_threadpool(file.read, self.part_size)
+                if not chunk:
+                    break
+                number = len(parts) + 1
+                part = await self._client.upload_part(
+                    Bucket=self.bucket, Key=location, UploadId=upload_id, PartNumber=number, Body=chunk
+                )
+                parts.append({"ETag": part["ETag"], "PartNumber": number})
+
+            await self._client.complete_multipart_upload(
+                Bucket=self.bucket, Key=location, UploadId=upload_id, MultipartUpload={"Parts": parts}
+            )
+        except Exception:
+            await self._client.abort_multipart_upload(Bucket=self.bucket, Key=location, UploadId=upload_id)
+            raise
+
+    async def store_file(self, temp_path: str, location: str, content_type: str) -> None:
+        try:
+            if await self._exists(location):
+                return
+
+            file = await run_in_threadpool(open, temp_path, "rb")
+            try:
+                if os.fstat(file.fileno()).st_size <= self.part_size:
+                    data = await run_in_threadpool(file.read)
+                    await self.write(location, data, content_type)
+                else:
+                    await self._upload_parts(file, location, content_type)
+            finally:
+                await run_in_threadpool(file.close)
+        finally:
+            await run_in_threadpool(_remove, temp_path)
+
+    async def write(self, location: str, data: bytes, content_type: str) -> None:
+        await self._client.put_object(
+            Bucket=self.bucket, Key=location, Body=data, ContentType=content_type,
+            CacheControl=IMMUTABLE_CACHE_CONTROL
+        )
+
+    async def read(self, location: str) -> bytes:
+        response = await self._client.get_object(Bucket=self.bucket, Key=location)
+        async with response["Body"] as stream:
+            return await stream.read()
+
+    async def delete(self, locations: Iterable[str]) -> None:
+        objects = [{"Key": location} for location in locations]
+        # delete_objects bir so'rovda ko'pi bilan 1000 ta kalit qabul qiladi
+        for i in range(0, len(objects), 1000):
+            await self._client.delete_objects(
+                Bucket=self.bucket, Delete={"Objects": objects[i:i + 1000], "Quiet": True}
+            )
+
+    async def url(self, location: str) -> str:
+        return await self._client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": location}, ExpiresIn=self.url_expires
+        )
+
+
+def create_storage_backend() -> StorageBackend:
+    backend = settings.MEDIA_STORAGE
+    if backend == "local":
+        return LocalStorageBackend()
+    if backend == "s3":
+        return S3StorageBackend(
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            path_style=settings.S3_PATH_STYLE,
+            part_size=settings.S3_PART_SIZE,
+            url_expires=settings.S3_PRESIGN_EXPIRES,
+        )
+    raise ValueError(f"Noma'lum MEDIA_STORAGE: {backend}")
+
+
+media_storage = create_storage_backend()
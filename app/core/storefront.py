@@ -0,0 +1,77 @@
+import asyncio
+import gzip
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi.templating import Jinja2Templates
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.catalogue import catalogue_version, catalogue_settled, get_storefront_products
+
+try:
+    import brotli
+except ImportError:  # brotli ixtiyoriy, bo'lmasa faqat gzip ishlatiladi
+    brotli = None
+
+templates = Jinja2Templates(directory="app/template")
+
+# Content-Encoding -> ETag qo'shimchasi: har bir ko'rinishning baytlari boshqa, ETag ham boshqa bo'lishi kerak
+ENCODING_ETAG_SUFFIX = {None: "", "gzip": "-gz", "br": "-br"}
+
+
+@dataclass(frozen=True)
+class RenderedPage:
+    version: int
+    html: bytes
+    gzip: bytes
+    br: Optional[bytes] = None
+
+    def body(self, accept_encoding: str) -> tuple[bytes, Optional[str]]:
+        encodings = set()
+        for part in accept_encoding.split(","):
+            name, _, params = part.strip().partition(";")
+            if params.replace(" ", "") not in ("q=0", "q=0.0"):
+                encodings.add(name.strip().lower())
+
+        if self.br is not None and "br" in encodings:
+            return self.br, "br"
+        if "gzip" in encodings:
+            return self.gzip, "gzip"
+        return self.html, None
+
+
+_page: Optional[RenderedPage] = None
+_render_lock = asyncio.Lock()
+
+
+def render_storefront(version: int, products: list) -> RenderedPage:
+    html = templates.get_template("index.html").render(products=products, settings=settings).encode("utf-8")
+    return RenderedPage(
+        version=version,
+        html=html,
+        gzip=gzip.compress(html, compresslevel=settings.STOREFRONT_GZIP_LEVEL),
+        br=brotli.compress(html, quality=settings.STOREFRONT_BROTLI_QUALITY) if brotli else None,
+    )
+
+
+async def get_storefront_page(db: AsyncSession) -> RenderedPage:
+    """
+    Bosh sahifa HTML ini katalog versiyasi bo'yicha keshlaydi. Sahifa faqat mahsulotlar
+    o'zgarganda qayta render qilinadi va oldindan siqilgan holda xotirada turadi.
+    """
+    global _page
+
+    version = catalogue_version()
+    if _page is not None and _page.version == version:
+        return _page
+
+    # Bir vaqtda kelgan so'rovlar sahifani faqat bir marta render qiladi
+    async with _render_lock:
+        if _page is not None and _page.version == version:
+            return _page
+        products = await get_storefront_products(db)
+        page = render_storefront(version, products)
+        if catalogue_settled(version):
+            _page = page
+    return page
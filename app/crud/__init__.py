@@ -2,3 +2,6 @@ from .order import *
 from .product import *
 from .user import *
 from .category import *
+from .review import *
+from .catalogue import *
+from .media import *
@@ -0,0 +1,200 @@
+import functools
+import logging
+import time
+from typing import Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.invalidation import invalidation_bus
+from app.core.storage import media_storage
+from app.crud.category import get_categories
+from app.crud.media import image_in_use, lock_image
+from app.crud.product import get_all_products, get_products_page, get_product, get_top_rated_products
+from app.database.base import get_session
+from app.database.models import Product, Category
+from app.database.sqlite import begin_write
+from app.utils import (
+    TTLCache, MISSING, STOCK_FIELD, serialize_product, serialize_product_fields, create_image_variants,
+    image_variant_paths
+)
+
+logger = logging.getLogger(__name__)
+
+STOREFRONT_FIELDS = ("id", "name", "image", "image_variants", "telegram_file_id", "price", "discount")
+
+# Katalog (mahsulotlar va kategoriyalar) o'qishlari uchun kesh. Qiymatlar ORM obyektlar emas,
+# serializatsiya qilingan dict lar - ular so'rovlar o'rtasida xavfsiz ulashiladi.
+# Ombor qoldig'i keshlanmaydi (with_stock), shuning uchun buyurtmalar katalog versiyasini o'zgartirmaydi.
+catalogue_cache = TTLCache(maxsize=settings.CATALOGUE_CACHE_SIZE, ttl=settings.CATALOGUE_CACHE_TTL)
+_cached_version = None
+
+
+def catalogue_version() -> int:
+    """
+    Joriy katalog versiyasini qaytaradi va boshqa worker uni o'zgartirgan bo'lsa mahalliy keshni tozalaydi.
+    """
+    global _cached_version
+
+    version = invalidation_bus.version()
+    if version != _cached_version:
+        catalogue_cache.clear()
+        _cached_version = version
+    return version
+
+
+def catalogue_settled(version: int) -> bool:
+    """
+    Replika ishlatilsa, katalog o'zgargandan keyin DB_REPLICA_LAG soniya ichida undan o'qilgan
+    ma'lumot eskirgan bo'lishi mumkin - bunday natijalar keshlanmaydi va ETag olmaydi.
+    """
+    if not settings.DB_REPLICA_URL:
+        return True
+    return time.time_ns() - version >= settings.DB_REPLICA_LAG * 1_000_000_000
+
+
+def catalogue_cached(func):
+    @functools.wraps(func)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        version = catalogue_version()
+        key = (func.__name__, args, tuple(sorted(kwargs.items())))
+        value = catalogue_cache.get(key)
+        if value is MISSING:
+            generation = catalogue_cache.generation
+            value = await func(db, *args, **kwargs)
+            if catalogue_settled(version):
+                catalogue_cache.set(key, value, generation=generation)
+        return value
+
+    return wrapper
+
+
+async def invalidate_catalogue() -> None:
+    global _cached_version
+
+    catalogue_cache.clear()
+    try:
+        _cached_version = await invalidation_bus.bump()
+    except Exception as e:
+        # O'zgarish allaqachon saqlangan - so'rov xato bilan tugamaydi, boshqa workerlar
+        # keshi CATALOGUE_CACHE_TTL dan keyin yangilanadi
+        logger.error(f"Failed to publish catalogue invalidation: {e}")
+
+
+async def with_stock(db: AsyncSession, products: list, fields: Tuple[str, ...]) -> list:
+    """
+    Keshdagi mahsulotlarga joriy ombor qoldig'ini bitta so'rov bilan qo'shadi. Keshdagi
+    dict lar o'zgartirilmaydi - nusxalar qaytariladi.
+    """
+    if STOCK_FIELD not in fields or not products:
+        return products
+    result = await db.execute(
+        select(Product.id, Product.count_in_stock).where(Product.id.in_([product["id"] for product in products]))
+    )
+    stock = dict(result.all())
+    return [{**product, STOCK_FIELD: stock.get(product["id"])} for product in products]
+
+
+def without_stock(fields: Tuple[str, ...]) -> Tuple[str, ...]:
+    return tuple(field for field in fields if field != STOCK_FIELD)
+
+
+def catalogue_cache_stats() -> dict:
+    return {**catalogue_cache.stats(), "version": catalogue_version(), "bus": settings.CACHE_BUS_BACKEND}
+
+
+@catalogue_cached
+async def _products_listing(db: AsyncSession, fields: Tuple[str, ...], include: Tuple[str, ...], **filters) -> dict:
+    products, next_cursor = await get_products_page(db, fields=fields, include=include, **filters)
+    return {
+        "products": [serialize_product_fields(product, fields, include) for product in products],
+        "next_cursor": next_cursor
+    }
+
+
+@catalogue_cached
+async def _product_detail(db: AsyncSession, product_id: int, fields: Tuple[str, ...],
+                          include: Tuple[str, ...]) -> Optional[dict]:
+    db_product = await get_product(product_id, db, fields=fields, include=include)
+    if db_product is None:
+        return None
+    return serialize_product_fields(db_product, fields, include)
+
+
+@catalogue_cached
+async def _top_rated_listing(db: AsyncSession, fields: Tuple[str, ...], include: Tuple[str, ...]) -> dict:
+    products = await get_top_rated_products(db, fields=fields, include=include)
+    return {"products": [serialize_product_fields(product, fields, include) for product in products]}
+
+
+async def get_products_listing(db: AsyncSession, fields: Tuple[str, ...], include: Tuple[str, ...], **filters) -> dict:
+    listing = await _products_listing(db, without_stock(fields), include, **filters)
+    return {**listing, "products": await with_stock(db, listing["products"], fields)}
+
+
+async def get_product_detail(db: AsyncSession, product_id: int, fields: Tuple[str, ...],
+                             include: Tuple[str, ...]) -> Optional[dict]:
+    product = await _product_detail(db, product_id, without_stock(fields), include)
+    if product is None:
+        return None
+    return (await with_stock(db, [product], fields))[0]
+
+
+async def get_top_rated_listing(db: AsyncSession, fields: Tuple[str, ...], include: Tuple[str, ...]) -> dict:
+    listing = await _top_rated_listing(db, without_stock(fields), include)
+    return {**listing, "products": await with_stock(db, listing["products"], fields)}
+
+
+@catalogue_cached
+async def get_categories_listing(db: AsyncSession) -> dict:
+    categories = await get_categories(db)
+    return {
+        "categories": [
+            {"id": category.id, "name": category.name, "image_path": category.image_path,
+             "image_variants": category.image_variants}
+            for category in categories
+        ]
+    }
+
+
+@catalogue_cached
+async def get_storefront_products(db: AsyncSession) -> list:
+    # Bosh sahifa faqat serialize_product dagi ustunlarni ishlatadi
+    products = await get_all_products(db, fields=STOREFRONT_FIELDS, include=())
+    return [serialize_product(product) for product in products]
+
+
+async def update_image_variants(model, object_id: int, path: str) -> None:
+    """
+    Rasm variantlarini jarayonlar poolida yaratadi va yozuvga saqlaydi. So'rovdan keyin
+    BackgroundTasks orqali ishga tushiriladi.
+
+    :param model: Product yoki Category.
+    :param object_id: Yozuv ID si.
+    :param path: Yuklangan rasm yo'li.
+    """
+    image_column = Product.image if model is Product else Category.image_path
+    try:
+        variants = await create_image_variants(path)
+    except Exception as e:
+        logger.error(f"Failed to create image variants for {path}: {e}")
+        return
+
+    async with get_session() as session:
+        await begin_write(session)
+        # Shu orada rasm yana almashtirilgan bo'lsa eski variantlar yozilmaydi
+        result = await session.execute(
+            update(model)
+            .where(model.id == object_id, image_column == path)
+            .values(image_variants=variants)
+        )
+        if not result.rowcount:
+            # Yozilgan variant fayllariga hech kim murojaat qilmaydi. Asl rasm boshqa yozuvda
+            # ishlatilayotgan bo'lsa, variantlar (bir xil nomli) o'sha yozuvniki ham bo'lishi mumkin
+            if variants:
+                await lock_image(session, path)
+                if not await image_in_use(session, path):
+                    await media_storage.delete(image_variant_paths(variants))
+    if result.rowcount:
+        await invalidate_catalogue()
@@ -5,6 +5,7 @@ from sqlalchemy.future import select
 from app.database import models
 from app.core.config import settings
 from app.database.models import Product
+from app.crud.media import release_image
 from app.utils import is_valid_image, save_image
 
 async def create_product(
@@ -27,7 +28,7 @@ async def create_product(
     if not db_category:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Kategoriya topilmadi")
 
-    file_location = save_image(image, name=name, dir=settings.PRODUCT_DIR)
+    file_location = await save_image(image, dir=settings.PRODUCT_DIR)
     db_product = Product(
         name=name,
         description=description,
@@ -72,10 +73,13 @@ async def update_category(db: AsyncSession, category_id: int, name: str = None,
 
 
 async def delete_category(db: AsyncSession, category_id: int):
-    async with db.begin():
-        db_category = await db.get(models.Category, category_id)
-        if db_category:
-            db.delete(db_category)
-            await db.commit()
-            return True
+    db_category = await db.get(models.Category, category_id)
+    if not db_category:
         return False
+
+    image_path, image_variants = db_category.image_path, db_category.image_variants
+    await db.delete(db_category)
+    await db.commit()
+
+    await release_image(image_path, image_variants)
+    return True
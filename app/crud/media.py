@@ -0,0 +1,81 @@
+from typing import Optional
+
+from fastapi import UploadFile
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.storage import media_storage
+from app.database.base import get_session
+from app.database.models import Product, Category
+from app.database.sqlite import begin_write
+from app.utils import image_variant_paths, stage_image, store_staged_image, discard_staged_image
+
+
+async def image_in_use(db: AsyncSession, path: str) -> bool:
+    """Rasm fayliga biror mahsulot yoki kategoriya murojaat qiladimi."""
+    result = await db.execute(select(Product.id).where(Product.image == path).limit(1))
+    if result.first() is not None:
+        return True
+
+    result = await db.execute(select(Category.id).where(Category.image_path == path).limit(1))
+    return result.first() is not None
+
+
+async def lock_image(db: AsyncSession, path: str) -> None:
+    """
+    Rasm yo'lini joriy tranzaksiya oxirigacha bloklaydi: yuklash (`store_image`) va o'chirish
+    (`release_image`) bitta fayl ustida bir vaqtda ishlamaydi.
+
+    Postgres da yo'l bo'yicha advisory lock olinadi. SQLite da alohida qulf yo'q - tranzaksiya
+    `begin_write` bilan boshlangan bo'lishi kerak, u butun bazaning yozish qulfini ushlaydi.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(path))))
+
+
+async def store_image(db: AsyncSession, image: UploadFile, dir: str) -> str:
+    """
+    Rasmni saqlaydi va yo'lini `db` tranzaksiyasi tugaguncha `release_image` dan himoyalaydi.
+
+    Bir xil rasm allaqachon saqlangan bo'lsa u qayta yuklanmaydi. Qulfsiz holatda boshqa yozuvdan
+    o'chirilayotgan fayl "bor" deb topilib, keyin o'chirib yuborilishi mumkin edi; endi o'chirish
+    qulf ostida yozuvni ko'radi yoki undan oldin tugaydi va fayl shu yerda qayta yoziladi.
+    SQLite da chaqiruvchi tranzaksiyani `begin_write` bilan boshlagan bo'lishi kerak.
+
+    :param image: Yuklangan rasm.
+    :param dir: Saqlanadigan papka.
+    :return: Saqlangan fayl yo'li (S3 da obyekt kaliti).
+    """
+    staged = await stage_image(image, dir)
+    try:
+        await lock_image(db, staged.location)
+    except Exception:
+        await discard_staged_image(staged)
+        raise
+    return await store_staged_image(staged)
+
+
+async def release_image(path: Optional[str], variants: Optional[dict] = None) -> bool:
+    """
+    Rasm va uning variantlarini, agar ularga boshqa yozuv murojaat qilmasa, o'chiradi.
+
+    Bir xil rasmlar bitta faylda saqlanadi, shuning uchun yozuv o'chirilgan yoki rasmi
+    almashtirilgandan keyin (commit dan so'ng) chaqiriladi. Tekshirish va o'chirish alohida
+    tranzaksiyada `lock_image` qulfi ostida bajariladi.
+
+    :param path: Asl rasm yo'li.
+    :param variants: Yozuvdagi image_variants.
+    :return: Fayllar o'chirilgan bo'lsa True.
+    """
+    if not path:
+        return False
+
+    async with get_session() as session:
+        await begin_write(session)
+        await lock_image(session, path)
+        if await image_in_use(session, path):
+            return False
+
+        await media_storage.delete([path, *image_variant_paths(variants)])
+        return True
@@ -1,64 +1,114 @@
-from typing import Type
+from typing import Dict, Optional, Type
 
 from fastapi import HTTPException
+from sqlalchemy import case, desc, func, insert, update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
 
-from app.bot import bot
 from app.core.config import settings
-from app.database.models import Order, OrderItem, Product
+from app.database.models import Order, OrderItem, OrderStatus, Product
+from app.database.sqlite import begin_write
 from app.schemas import OrderCreateSchema, UserResponse
 
 
 async def send_telegram_message(message: str):
+    # app.bot -> app.bot.helper -> app.crud aylanma importining oldini olish uchun
+    from app.bot import bot
+
     try:
         await bot.send_message(chat_id=settings.OWNER_ID, text=message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Telegram xabarini jo'natishda xato: {str(e)}")
 
 
-async def create_order(db: AsyncSession, order_data: OrderCreateSchema, current_user: UserResponse) -> Order:
-    try:
-        total_price = 0
-        order_items = []
-
-        async with db.begin() as transaction:
-            for item in order_data.items:
-                product = await db.get(Product, item.product_id)
-                if not product:
-                    raise HTTPException(status_code=404, detail=f"Mahsulot {item.product_id} topilmadi")
-
-                if product.count_in_stock < item.quantity:
-                    raise HTTPException(status_code=400,
-                                        detail=f"Mahsulot {item.product_id} uchun yetarli miqdor yo'q")
+def order_load_options() -> list:
+    return [
+        selectinload(Order.items)
+        .selectinload(OrderItem.product)
+        .load_only(Product.id, Product.name, Product.price, Product.image, Product.image_variants,
+                   Product.average_rating)
+    ]
 
-                if item.quantity == 0:
-                    raise HTTPException(status_code=400, detail="Mahsulot miqdori nolga teng bo'lishi mumkin emas")
 
-                item_price = product.price * item.quantity
-                total_price += item_price
-                product.count_in_stock -= item.quantity
+def merge_order_items(items) -> Dict[int, int]:
+    # Bir xil mahsulot bir necha marta kelsa miqdorlari qo'shiladi
+    quantities = {}
+    for product_id, quantity in items:
+        if quantity <= 0:
+            raise HTTPException(status_code=400, detail="Mahsulot miqdori noldan katta bo'lishi kerak")
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
 
-                order_item = OrderItem(
-                    product_id=item.product_id,
-                    quantity=item.quantity,
-                    price=item_price
-                )
-                db.add(order_item)
-                order_items.append(order_item)
+    if not quantities:
+        raise HTTPException(status_code=400, detail="Buyurtmada mahsulot yo'q")
+    return quantities
 
-            order = Order(user_id=current_user.id, status="kutmoqda", total_price=total_price)
-            db.add(order)
-            await db.flush()
 
-            for order_item in order_items:
-                order_item.order_id = order.id
+async def place_order(db: AsyncSession, user_id: int, quantities: Dict[int, int]) -> Order:
+    """
+    REST API va bot uchun umumiy buyurtma yaratish yo'li.
 
+    Savatdagi mahsulotlar soniga bog'liq bo'lmagan holda bitta tranzaksiyada o'zgarmas
+    sondagi so'rovlar bajariladi: mahsulotlarni olish, qoldiqni kamaytirish, buyurtma va
+    uning barcha elementlarini qo'shish.
+    """
+    try:
+        await begin_write(db)
+
+        # Barcha mahsulotlar bitta IN so'rovi bilan olinadi. Postgres da qatorlar FOR UPDATE bilan
+        # (deadlock bo'lmasligi uchun id tartibida) bloklanadi; SQLite FOR UPDATE ni e'tiborsiz qoldiradi,
+        # u yerda yozuvlarni quyidagi shartli UPDATE ning yozish bloki ketma-ket qiladi.
+        result = await db.execute(
+            select(Product.id, Product.price, Product.count_in_stock)
+            .where(Product.id.in_(quantities))
+            .order_by(Product.id)
+            .with_for_update()
+        )
+        products = {row.id: row for row in result}
+
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if not product:
+                raise HTTPException(status_code=404, detail=f"Mahsulot {product_id} topilmadi")
+            if product.count_in_stock < quantity:
+                raise HTTPException(status_code=400, detail=f"Mahsulot {product_id} uchun yetarli miqdor yo'q")
+
+        # Ombor qoldig'i bitta UPDATE bilan kamaytiriladi. `count_in_stock >= qty` sharti
+        # parallel buyurtmalarda ham minusga tushishga yo'l qo'ymaydi.
+        quantity_case = case(quantities, value=Product.id)
+        stock_update = await db.execute(
+            update(Product)
+            .where(Product.id.in_(quantities), Product.count_in_stock >= quantity_case)
+            .values(count_in_stock=Product.count_in_stock - quantity_case)
+            .execution_options(synchronize_session=False)
+        )
+        if stock_update.rowcount != len(quantities):
+            raise HTTPException(status_code=409, detail="Mahsulotlar qoldig'i o'zgardi, qaytadan urinib ko'ring")
+
+        total_price = sum(products[product_id].price * quantity for product_id, quantity in quantities.items())
+        order = Order(user_id=user_id, status=OrderStatus.PENDING, total_price=total_price)
+        db.add(order)
+        await db.flush()
+
+        # Barcha elementlar bitta INSERT ... VALUES (...), (...) bilan qo'shiladi.
+        # OrderItem.price - mahsulotning bir dona narxi.
+        await db.execute(insert(OrderItem).values([
+            {
+                "order_id": order.id,
+                "product_id": product_id,
+                "quantity": quantity,
+                "price": products[product_id].price
+            }
+            for product_id, quantity in quantities.items()
+        ]))
         await db.commit()
-        await db.refresh(order)
-
         return order
 
+    except HTTPException:
+        await db.rollback()
+        raise
+
     except SQLAlchemyError as e:
         await db.rollback()
         error_message = f"Buyurtmani yaratishda xato: {str(e)}"
@@ -66,16 +116,37 @@ async def create_order(db: AsyncSession, order_data: OrderCreateSchema, current_
         raise HTTPException(status_code=500, detail=error_message)
 
 
-async def get_orders(db: AsyncSession, current_user: UserResponse):
+async def create_order(db: AsyncSession, order_data: OrderCreateSchema, current_user: UserResponse) -> Order:
+    quantities = merge_order_items((item.product_id, item.quantity) for item in order_data.items)
+    order = await place_order(db, current_user.id, quantities)
+
+    result = await db.execute(select(Order).options(*order_load_options()).where(Order.id == order.id))
+    return result.scalar_one()
+
+
+async def get_orders(db: AsyncSession, current_user: UserResponse, limit: int, cursor: Optional[int] = None):
     try:
-        orders_query = await db.execute(select(Order).where(Order.user_id == current_user.id))
+        # Buyurtmalar, ularning elementlari va mahsulotlar qisqa ko'rinishi - jami 3 ta so'rov
+        stmt = select(Order).options(*order_load_options()).where(Order.user_id == current_user.id)
+        if cursor is not None:
+            stmt = stmt.where(Order.id < cursor)
+
+        orders_query = await db.execute(stmt.order_by(desc(Order.id)).limit(limit + 1))
         orders = orders_query.scalars().all()
 
-        if not orders:
+        if not orders and cursor is None:
             raise HTTPException(status_code=404, detail="Joriy foydalanuvchi uchun buyurtmalar topilmadi")
 
-        total_price = sum(order.total_price for order in orders)
-        return {"total_price": total_price, "orders": orders}
+        next_cursor = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            next_cursor = orders[-1].id
+
+        # Umumiy summa barcha buyurtmalar bo'yicha SQL da hisoblanadi
+        total_query = await db.execute(
+            select(func.coalesce(func.sum(Order.total_price), 0)).where(Order.user_id == current_user.id)
+        )
+        return {"total_price": total_query.scalar_one(), "orders": orders, "next_cursor": next_cursor}
 
     except SQLAlchemyError as e:
         error_message = f"Buyurtmalarni olishda xato: {str(e)}"
@@ -1,52 +1,152 @@
-import os
-from typing import Optional
+from typing import Optional, Sequence, Tuple
 
 from fastapi import HTTPException, status
-from fastapi.responses import JSONResponse
 from sqlalchemy import desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, load_only
 
-from app.core.config import settings
+from app.crud.media import release_image
 from app.database.models import Product
+from app.utils.helper import PRODUCT_FIELDS, PRODUCT_DEFAULT_FIELDS, PRODUCT_SUMMARY_FIELDS, PRODUCT_RELATIONS
 
 
-async def get_all_products(db: AsyncSession):
+def parse_product_fields(
+        fields: Optional[str],
+        include: Optional[str],
+        default_include: Tuple[str, ...] = PRODUCT_RELATIONS
+) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    `fields=` va `include=` query parametrlarini tekshiradi.
+
+    `fields=summary` - id, name, price, image, image_variants, average_rating. `include=` bo'sh
+    bo'lsa hech qanday bog'langan obyekt (category, reviews) yuklanmaydi. count_in_stock faqat
+    `fields=` da aniq so'ralganda qaytariladi.
+    """
+    if fields is None:
+        selected = PRODUCT_DEFAULT_FIELDS
+    elif fields.strip() == "summary":
+        selected = PRODUCT_SUMMARY_FIELDS
+    else:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        selected = tuple(dict.fromkeys(["id", *requested]))
+
+    unknown = set(selected) - set(PRODUCT_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Noma'lum maydonlar: {', '.join(sorted(unknown))}")
+
+    if include is None:
+        relations = default_include
+    else:
+        relations = tuple(dict.fromkeys(rel.strip() for rel in include.split(",") if rel.strip()))
+
+    unknown = set(relations) - set(PRODUCT_RELATIONS)
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Noma'lum bog'lanishlar: {', '.join(sorted(unknown))}")
+
+    return selected, relations
+
+
+def product_load_options(fields=PRODUCT_FIELDS, include=PRODUCT_RELATIONS) -> list:
+    columns = [getattr(Product, field) for field in fields]
+    options = []
+
+    if "category" in include:
+        columns.append(Product.category_id)
+        options.append(selectinload(Product.category))
+    if "reviews" in include:
+        options.append(selectinload(Product.reviews))
+
+    return [load_only(*columns), *options]
+
+
+async def get_all_products(
+        db: AsyncSession,
+        fields: Tuple[str, ...] = PRODUCT_FIELDS,
+        include: Tuple[str, ...] = PRODUCT_RELATIONS
+):
     db_products = await db.execute(
-        select(Product).options(selectinload(Product.category), selectinload(Product.reviews))
+        select(Product).options(*product_load_options(fields, include))
     )
     return db_products.scalars().all()
 
 
-async def get_product(product_id: int, db: AsyncSession) -> Optional[Product]:
+async def get_products_page(
+        db: AsyncSession,
+        limit: int,
+        cursor: Optional[int] = None,
+        category_id: Optional[int] = None,
+        type: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        fields: Tuple[str, ...] = PRODUCT_FIELDS,
+        include: Tuple[str, ...] = PRODUCT_RELATIONS,
+) -> Tuple[Sequence[Product], Optional[int]]:
+    """
+    Mahsulotlarni id bo'yicha keyset (cursor) pagination bilan qaytaradi.
+
+    `cursor` - oldingi sahifadagi oxirgi mahsulot id si. Natijada sahifa va
+    keyingi sahifa uchun cursor (oxirgi sahifada None) qaytariladi.
+    """
+    stmt = select(Product).options(*product_load_options(fields, include))
+
+    if category_id is not None:
+        stmt = stmt.where(Product.category_id == category_id)
+    if type is not None:
+        stmt = stmt.where(Product.type == type)
+    if min_price is not None:
+        stmt = stmt.where(Product.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(Product.price <= max_price)
+    if cursor is not None:
+        stmt = stmt.where(Product.id < cursor)
+
+    # Keyingi sahifa bor-yo'qligini bilish uchun bitta ortiqcha qator olinadi
+    stmt = stmt.order_by(desc(Product.id)).limit(limit + 1)
+    db_products = await db.execute(stmt)
+    products = db_products.scalars().all()
+
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_cursor = products[-1].id
+    return products, next_cursor
+
+
+async def get_product(
+        product_id: int,
+        db: AsyncSession,
+        fields: Tuple[str, ...] = PRODUCT_FIELDS,
+        include: Tuple[str, ...] = PRODUCT_RELATIONS
+) -> Optional[Product]:
     db_product = await db.execute(
-        select(Product).options(selectinload(Product.category), selectinload(Product.reviews)).where(
-            Product.id == product_id)
+        select(Product).options(*product_load_options(fields, include)).where(Product.id == product_id)
     )
     return db_product.scalar_one_or_none()
 
 
-async def get_top_rated_products(db: AsyncSession):
+async def get_top_rated_products(
+        db: AsyncSession,
+        fields: Tuple[str, ...] = PRODUCT_FIELDS,
+        include: Tuple[str, ...] = PRODUCT_RELATIONS
+):
     db_products = await db.execute(
-        select(Product).order_by(desc(Product.average_rating)).options(selectinload(Product.category),
-                                                                       selectinload(Product.reviews))
+        select(Product).order_by(desc(Product.average_rating)).options(*product_load_options(fields, include))
     )
     return db_products.scalars().all()
 
 
-async def delete_product(product_id: int, db: AsyncSession) -> JSONResponse:
-    async with db.begin():
-        db_product = await db.execute(select(Product).where(Product.id == product_id))
-        db_product = db_product.scalar_one_or_none()
-        if not db_product:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Mahsulot topilmadi")
-
-        if db_product.image and os.path.exists(os.path.join(settings.PRODUCT_DIR, db_product.image)):
-            os.remove(os.path.join(settings.PRODUCT_DIR, db_product.image))
+async def delete_product(product_id: int, db: AsyncSession) -> bool:
+    db_product = await db.get(Product, product_id)
+    if not db_product:
+        return False
 
-        db.delete(db_product)
-        await db.commit()
+    image, image_variants = db_product.image, db_product.image_variants
+    await db.delete(db_product)
+    await db.commit()
 
-    return JSONResponse(status_code=status.HTTP_204_NO_CONTENT,
-                        content={"message": f"Mahsulot {product_id} muvaffaqiyatli o'chirildi"})
+    # Rasm boshqa mahsulotlarda ham ishlatilgan bo'lishi mumkin
+    await release_image(image, image_variants)
+    return True
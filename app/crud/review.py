@@ -0,0 +1,57 @@
+from typing import Optional, Sequence, Tuple
+
+from sqlalchemy import desc, update, cast, Float, Numeric, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database.models import Product, Review
+from app.schemas import ReviewCreate
+
+
+async def create_review(db: AsyncSession, review: ReviewCreate, user_id: int) -> Review:
+    db_review = Review(
+        name=review.name,
+        product_id=review.product_id,
+        rating=review.rating,
+        comment=review.comment,
+        user_id=user_id
+    )
+    db.add(db_review)
+
+    # Reyting yig'indisi va sharhlar soni SQL da atomar yangilanadi, barcha sharhlarni qayta o'qish shart emas.
+    # SET ichidagi ustunlar yangilanishdan oldingi qiymatlarni bildiradi.
+    new_sum = Product.rating_sum + review.rating
+    new_total = Product.total_review + 1
+    await db.execute(
+        update(Product)
+        .where(Product.id == review.product_id)
+        .values(
+            rating_sum=new_sum,
+            total_review=new_total,
+            average_rating=func.round(cast(cast(new_sum, Float) / new_total, Numeric), 3)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    await db.refresh(db_review)
+    return db_review
+
+
+async def get_product_reviews(
+        db: AsyncSession,
+        product_id: int,
+        limit: int,
+        cursor: Optional[int] = None
+) -> Tuple[Sequence[Review], Optional[int]]:
+    stmt = select(Review).where(Review.product_id == product_id)
+    if cursor is not None:
+        stmt = stmt.where(Review.id < cursor)
+
+    result = await db.execute(stmt.order_by(desc(Review.id)).limit(limit + 1))
+    reviews = result.scalars().all()
+
+    next_cursor = None
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        next_cursor = reviews[-1].id
+    return reviews, next_cursor
@@ -1,13 +1,17 @@
+from datetime import datetime, timedelta
 from typing import Optional, Sequence
 
 from fastapi import HTTPException, status
+from sqlalchemy import and_, delete, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.sql import update
 
+from app.core.config import settings
 from app.core.hashing import get_password_hash
+from app.core.security import invalidate_user
 from app.database.base import get_session
-from app.database.models import User
+from app.database.models import User, BlacklistedToken
 from app.schemas import UserCreate, UserUpdate
 
 
@@ -46,6 +50,7 @@ async def update_user_active_status(db: AsyncSession, user: User) -> User:
     db.add(user)
     await db.commit()
     await db.refresh(user)
+    invalidate_user(user.id)
     return user
 
 
@@ -53,6 +58,7 @@ async def update_user_inactive_status(db: AsyncSession, user: User) -> User:
     db.add(user)
     await db.commit()
     await db.refresh(user)
+    invalidate_user(user.id)
     return user
 
 
@@ -62,7 +68,7 @@ async def get_user_by_phone_number(db: AsyncSession, phone_number: int) -> Optio
 
 
 async def create_user(db: AsyncSession, user: UserCreate) -> User:
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     new_user = User(
         first_name=user.first_name,
         last_name=user.last_name,
@@ -85,13 +91,14 @@ async def update_user(db: AsyncSession, user_id: int, user_update: UserUpdate) -
         if user_update.phone_number:
             db_user.phone_number = user_update.phone_number
         if user_update.password:
-            db_user.hashed_password = get_password_hash(user_update.password)
+            db_user.hashed_password = await get_password_hash(user_update.password)
         if user_update.first_name:
             db_user.first_name = user_update.first_name
         if user_update.last_name:
             db_user.last_name = user_update.last_name
         await db.commit()
         await db.refresh(db_user)
+        invalidate_user(db_user.id)
         return db_user
 
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foydalanuvchi topilmadi")
@@ -104,6 +111,38 @@ async def delete_user(db: AsyncSession, user_id: int) -> dict:
     if db_user:
         db_user.is_active = False
         await db.commit()
+        invalidate_user(db_user.id)
         return {"message": f"Foydalanuvchi {user_id} muvaffaqiyatli o'chirildi"}
 
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foydalanuvchi topilmadi")
+
+
+async def purge_expired_tokens(db: AsyncSession, batch_size: int) -> int:
+    """
+    Muddati o'tgan qora ro'yxat yozuvlarini qismlarga bo'lib o'chiradi.
+
+    Har bir qism alohida tranzaksiyada o'chiriladi, shuning uchun jadval uzoq bloklanmaydi.
+    :return: O'chirilgan yozuvlar soni.
+    """
+    now = datetime.utcnow()
+    legacy_cutoff = now - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    expired = or_(
+        BlacklistedToken.expires_at <= now,
+        and_(BlacklistedToken.expires_at.is_(None), BlacklistedToken.blacklisted_on <= legacy_cutoff)
+    )
+
+    purged = 0
+    while True:
+        result = await db.execute(select(BlacklistedToken.id).where(expired).limit(batch_size))
+        ids = result.scalars().all()
+        if not ids:
+            break
+
+        await db.execute(delete(BlacklistedToken).where(BlacklistedToken.id.in_(ids)))
+        await db.commit()
+        purged += len(ids)
+
+        if len(ids) < batch_size:
+            break
+
+    return purged
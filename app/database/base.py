@@ -1,25 +1,49 @@
-import logging
+import os
 from contextlib import asynccontextmanager
 
-from psycopg2 import ProgrammingError
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from sqlalchemy.orm import declarative_base
 
 from app.core.config import settings
+from app.database.pool import InstrumentedPool, PoolMetrics
+from app.database.sqlite import install_sqlite_pragmas
 
-# async_engine = create_async_engine(
-#     settings.SQLALCHEMY_DATABASE_URL,
-#     echo=False,
-#     pool_size=20,         # Ulanishlar poolining o'lchami
-#     max_overflow=10,      # Qo'shimcha ulanishlar
-#     pool_timeout=30       # Ulanish uchun kutish vaqti
-# )
-
-async_engine = create_async_engine(
-    settings.SQLALCHEMY_DATABASE_URL,
-    echo=False,
-    future=True
-)
+
+def _create_engine(url: str) -> AsyncEngine:
+    # DB_POOL_SIZE va DB_MAX_OVERFLOW - barcha workerlar uchun umumiy chegara, har bir worker o'z ulushini oladi
+    engine = create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_WORKER_POOL_SIZE,  # Ulanishlar poolining o'lchami
+        max_overflow=settings.DB_WORKER_MAX_OVERFLOW,  # Qo'shimcha ulanishlar
+        pool_timeout=settings.DB_POOL_TIMEOUT,  # Ulanish uchun kutish vaqti
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING
+    )
+    engine.sync_engine.pool.metrics = PoolMetrics(settings.DB_POOL_SLOW_CHECKOUT)
+
+    if engine.dialect.name == "sqlite":
+        install_sqlite_pragmas(engine.sync_engine)
+    return engine
+
+
+async_engine = _create_engine(settings.SQLALCHEMY_DATABASE_URL)
+
+# Katalog va buyurtmalar tarixini o'qish uchun replika. Berilmasa o'qishlar ham asosiy bazaga boradi.
+# Yozishlar va yozishdan keyin darhol o'qiladigan joylar doim async_engine dan foydalanadi.
+read_engine = _create_engine(settings.DB_REPLICA_URL) if settings.DB_REPLICA_URL else async_engine
+
+
+def _dispose_in_child() -> None:
+    # gunicorn preload_app: master da ochilgan ulanishlar fork qilingan workerda ishlatilmaydi va
+    # yopilmaydi ham (socket ota jarayonniki) - har bir worker o'z poolini noldan ochadi
+    for engine in (async_engine, read_engine):
+        engine.sync_engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_dispose_in_child)
 
 async_session_maker = async_sessionmaker(
     bind=async_engine,
@@ -27,6 +51,12 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False
 )
 
+async_read_session_maker = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -38,6 +68,13 @@ async def get_async_session():
         await async_session_instance.close()
 
 
+async def get_async_read_session():
+    async_session_instance = async_read_session_maker()
+    try:
+        yield async_session_instance
+    finally:
+        await async_session_instance.close()
+
 
 @asynccontextmanager
 async def get_session():
@@ -52,13 +89,10 @@ async def get_session():
         await async_session.close()
 
 
-async def create_tables():
+@asynccontextmanager
+async def get_read_session():
+    async_session = async_read_session_maker()
     try:
-        async with async_engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-            logging.info("Database schema created successfully.")
-    except ProgrammingError as e:
-        if "duplicate table" in str(e):
-            print("Jadval allaqachon mavjud, e'tiborsiz qoldirilmoqda.")
-        else:
-            raise e  # Boshqa xatolarni ko'tarish  import logging
+        yield async_session
+    finally:
+        await async_session.close()
@@ -1,3 +1,4 @@
 from .product import *
 from .order import *
-from .user import *
\ No newline at end of file
+from .user import *
+from .cache import *
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, BigInteger
+
+from app.database.base import Base
+
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    # CACHE_BUS_BACKEND=postgres: katalog versiyasi workerlar o'rtasida shu jadvalda ulashiladi
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False)
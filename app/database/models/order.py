@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import Column, Integer, ForeignKey, Float, Enum, DateTime, func
+from sqlalchemy import Column, Integer, ForeignKey, Float, Enum, DateTime, Index, func
 from sqlalchemy.orm import relationship
 
 from app.database.base import Base
@@ -12,11 +12,15 @@ class OrderItem(Base):
     order_id = Column(Integer, ForeignKey('orders.id'))
     product_id = Column(Integer, ForeignKey('products.id'))
     quantity = Column(Integer)
-    price = Column(Float)
+    price = Column(Float)  # Bir dona narxi, qator summasi - price * quantity
 
     order = relationship('Order', back_populates='items')
     product = relationship('Product', back_populates='order_items')
 
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+    )
+
 
 class OrderStatus(enum.Enum):
     PENDING = "pending"
@@ -38,3 +42,8 @@ class Order(Base):
 
     user = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order")
+
+    # Foydalanuvchi buyurtmalar tarixi (keyset pagination) uchun
+    __table_args__ = (
+        Index("ix_orders_user_id_id", "user_id", "id"),
+    )
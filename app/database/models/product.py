@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, Float, Index, JSON
 from sqlalchemy.orm import relationship
 
 from app.database.base import Base
@@ -16,7 +16,9 @@ class Product(Base):
     count_in_stock = Column(Integer, nullable=False)
     total_review = Column(Integer, default=0, nullable=False)
     average_rating = Column(Float, default=0, nullable=False)
+    rating_sum = Column(Integer, default=0, server_default="0", nullable=False)
     image = Column(String, nullable=False)
+    image_variants = Column(JSON, nullable=True)  # {variant: {"width", "webp", "jpeg"}}
     telegram_file_id = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -25,6 +27,13 @@ class Product(Base):
     reviews = relationship("Review", back_populates="product")
     order_items = relationship("OrderItem", back_populates="product")
 
+    # Keyset pagination (id bo'yicha) va filtrlar uchun indekslar
+    __table_args__ = (
+        Index("ix_products_category_id_id", "category_id", "id"),
+        Index("ix_products_type_id", "type", "id"),
+        Index("ix_products_price_id", "price", "id"),
+    )
+
 
 class Review(Base):
     __tablename__ = "reviews"
@@ -41,6 +50,10 @@ class Review(Base):
     user = relationship("User", back_populates="reviews")
     product = relationship("Product", back_populates="reviews")
 
+    __table_args__ = (
+        Index("ix_reviews_product_id_id", "product_id", "id"),
+    )
+
 
 class Category(Base):
     __tablename__ = "categories"
@@ -48,6 +61,7 @@ class Category(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=True)
     image_path = Column(String, nullable=False)
+    image_variants = Column(JSON, nullable=True)
     telegram_file_id = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     products = relationship("Product", back_populates="category")
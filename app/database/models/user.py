@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String, Boolean, BigInteger, Enum, func
+from sqlalchemy import Column, DateTime, Integer, String, Boolean, BigInteger, Enum, func, false
 from sqlalchemy.orm import relationship
 
 from app.database.base import Base
@@ -21,6 +21,8 @@ class User(Base):
     phone_number = Column(BigInteger, unique=True, index=True)
     gender = Column(Enum(Gender, name='gender'), nullable=True)
     hashed_password = Column(String)
+    # True bo'lsa saqlangan parol yaroqsiz: login rad etiladi, yangi parol botdagi /reset_password orqali o'rnatiladi
+    password_reset_required = Column(Boolean, default=False, server_default=false(), nullable=False)
     is_active = Column(Boolean, default=True)
     is_stuff = Column(Boolean, default=False)
     is_superuser = Column(Boolean, default=False)
@@ -33,6 +35,9 @@ class User(Base):
 class BlacklistedToken(Base):
     __tablename__ = "blacklisted_tokens"
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(String, unique=True, index=True)
-    blacklisted_on = Column(DateTime, default=datetime.utcnow)
+    # Qidiruvlar jti bo'yicha, to'liq JWT satri uchun indeks kerak emas
+    token = Column(String)
+    jti = Column(String, unique=True, index=True, nullable=True)
+    expires_at = Column(DateTime, nullable=True, index=True)
+    blacklisted_on = Column(DateTime, default=datetime.utcnow, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
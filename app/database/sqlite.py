@@ -0,0 +1,60 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+
+def sqlite_pragmas() -> list[tuple[str, object]]:
+    """
+    Har bir yangi SQLite ulanishida bajariladigan PRAGMA lar.
+
+    journal_mode=WAL - o'qishlar yozishni kutmaydi; busy_timeout - band bazada darhol
+    `database is locked` o'rniga kutish; mmap_size va cache_size - o'qishlar uchun xotira.
+    """
+    return [
+        ("journal_mode", settings.SQLITE_JOURNAL_MODE),
+        ("synchronous", settings.SQLITE_SYNCHRONOUS),
+        ("busy_timeout", settings.SQLITE_BUSY_TIMEOUT),
+        ("mmap_size", settings.SQLITE_MMAP_SIZE),
+        ("cache_size", settings.SQLITE_CACHE_SIZE),
+    ]
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    # sqlite3 drayveri o'zi BEGIN yubormasin - tranzaksiya "begin" hodisasida boshlanadi
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def begin_transaction(connection) -> None:
+    # Odatda DEFERRED: o'qish tranzaksiyalari yozish qulfini olmaydi va bir-birini kutmaydi.
+    # Yozish yo'llari `begin_write` orqali IMMEDIATE so'raydi
+    mode = connection.get_execution_options().get("sqlite_begin", settings.SQLITE_BEGIN_MODE)
+    connection.exec_driver_sql(f"BEGIN {mode}")
+
+
+async def begin_write(db: AsyncSession) -> None:
+    """
+    Sessiyada yozish tranzaksiyasini boshlaydi. Ish birligining birinchi amali bo'lishi kerak.
+
+    WAL da o'qib keyin yozadigan DEFERRED tranzaksiya boshqa yozuvchi bo'lsa busy_timeout ni
+    kutmasdan SQLITE_BUSY_SNAPSHOT oladi; IMMEDIATE yozish qulfini boshida olib navbatda kutadi.
+    Boshqa bazalarda bu parametr e'tiborsiz qoldiriladi.
+
+    :raises RuntimeError: Sessiyada tranzaksiya allaqachon ochiq bo'lsa - uni bu yerda yopish
+        chaqiruvchining yozuvlarini boshqa tranzaksiyada saqlab yuborgan bo'lardi.
+    """
+    if db.in_transaction():
+        raise RuntimeError("begin_write tranzaksiya boshida chaqirilishi kerak")
+    await db.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+
+
+def install_sqlite_pragmas(engine: Engine) -> None:
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    event.listen(engine, "begin", begin_transaction)
@@ -1,27 +1,31 @@
 import logging
-import os
 
 from aiogram import types
-from fastapi import FastAPI, HTTPException, Request, Depends
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi import FastAPI, HTTPException, Request, Response, Depends, status
+from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import routers
-from app.bot import set_update, bot, set_command
-from app.core.config import settings
-from app.crud import get_all_products
-from app.database.base import get_async_session, create_tables
-from app.utils.helper import serialize_product
+from app.bot import set_update, bot, WEBHOOK_PATH
+from app.core.conditional import conditional_headers, is_not_modified
+from app.core.invalidation import invalidation_bus
+from app.core.maintenance import start_maintenance, stop_maintenance
+from app.core.media import media_files
+from app.core.ratelimit import RateLimitMiddleware, rate_limit_backend
+from app.core.storage import media_storage
+from app.core.storefront import ENCODING_ETAG_SUFFIX, get_storefront_page
+from app.crud.catalogue import catalogue_settled
+from app.database.base import get_async_read_session
+from app.utils import shutdown_image_workers
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
+app.add_middleware(RateLimitMiddleware)
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
-app.mount("/media", StaticFiles(directory="media"), name="media")
-templates = Jinja2Templates(directory="app/template")
+app.mount("/media", media_files, name="media")
 
 app.include_router(routers.auth_router)
 app.include_router(routers.user_router)
@@ -29,26 +33,26 @@ app.include_router(routers.product_router)
 app.include_router(routers.order_router)
 app.include_router(routers.review_router)
 app.include_router(routers.category_router)
-
-# Webhook URL
-WEBHOOK_PATH = f"/bot/{settings.BOT_TOKEN}"
-WEBHOOK_URL = settings.WEBHOOK_URL + WEBHOOK_PATH
+app.include_router(routers.metrics_router)
 
 
 @app.on_event("startup")
 async def on_startup():
-    try:
-        # Set up webhook
-        webhook_info = await bot.get_webhook_info()
-        if webhook_info.url != WEBHOOK_URL:
-            await bot.set_webhook(url=WEBHOOK_URL)
-            await set_command()
-            logger.info("Webhook set successfully.")
+    # Migratsiyalar va webhook `python -m app.bootstrap` da bir marta bajariladi - worker
+    # startupida DDL va Telegram API so'rovlari yo'q
+    await invalidation_bus.start()
+    await rate_limit_backend.start()
+    await media_storage.start()
+    await start_maintenance()
 
-        # Create database schema
-        await create_tables()
-    except Exception as e:
-        logger.error(f"Failed to set up webhook or create database schema: {e}")
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await stop_maintenance()
+    await invalidation_bus.stop()
+    await rate_limit_backend.stop()
+    await media_storage.stop()
+    shutdown_image_workers()
 
 
 @app.post(WEBHOOK_PATH, tags=["Bot update"])
@@ -60,37 +64,20 @@ async def bot_webhook(update: dict):
         logger.error(f"Error processing update: {e}")
 
 
-@app.get("/media/{filename}", tags=["Get files"])
-async def get_file(filename: str):
-    media_dir = "app/media"
-    file_path = os.path.join(media_dir, filename)
-
-    # Ensure security
-    if not os.path.commonpath([file_path, media_dir]) == media_dir:
-        logger.warning(f"Unauthorized access attempt: {file_path}")
-        raise HTTPException(status_code=403, detail="Forbidden")
-
-    # Check file existence
-    if not os.path.isfile(file_path):
-        logger.warning(f"File not found: {file_path}")
-        raise HTTPException(status_code=404, detail="File not found")
-
-    # Serve the file
-    try:
-        return FileResponse(file_path)
-    except Exception as e:
-        logger.error(f"Error serving file: {e}")
-        raise HTTPException(status_code=500, detail="Internal Server Error")
-
-
 @app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request, db: AsyncSession = Depends(get_async_session)):
+async def read_root(request: Request, db: AsyncSession = Depends(get_async_read_session)):
     try:
-        products = await get_all_products(db)
-        serialized_products = [serialize_product(product) for product in products]
-        return templates.TemplateResponse(
-            "index.html",
-            {"request": request, "products": serialized_products, "settings": settings})
+        page = await get_storefront_page(db)
+        body, encoding = page.body(request.headers.get("accept-encoding", ""))
+        headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if catalogue_settled(page.version):
+            headers.update(conditional_headers(page.version, ENCODING_ETAG_SUFFIX[encoding]))
+            if is_not_modified(request, headers["ETag"], page.version):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return HTMLResponse(content=body, headers=headers)
     except Exception as e:
         logger.error(f"Error fetching products: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
\ No newline at end of file
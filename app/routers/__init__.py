@@ -4,3 +4,4 @@ from .product import *
 from .review import *
 from .category import *
 from .order import *
+from .metrics import *
@@ -1,10 +1,13 @@
+from datetime import datetime
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.hashing import get_password_hash
-from app.core.security import create_access_token, verify_access_token
+from app.core.hashing import get_password_hash, verify_and_update_password
+from app.core.revocation import revocation_store, token_id
+from app.core.security import create_access_token, verify_access_token, decode_access_token, invalidate_token
 from app.crud import get_user_by_phone_number, create_user, update_user_inactive_status
 from app.database.base import get_async_session
 from app.database.models import BlacklistedToken, User
@@ -23,6 +26,19 @@ async def login_user(user: UserLogin, db: AsyncSession = Depends(get_async_sessi
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Telefon raqami ro'yxatdan o'tmagan")
 
+    if db_user.password_reset_required:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Parolingizni tiklash kerak: Telegram botda /reset_password buyrug'ini yuboring")
+
+    verified, new_hash = await verify_and_update_password(user.password, db_user.hashed_password)
+    if not verified:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Parol noto'g'ri")
+
+    if new_hash:
+        db_user.hashed_password = new_hash
+        await db.commit()
+
     access_token = create_access_token(data={"phone_number": user.phone_number})
     return JSONResponse(content={"access_token": access_token, "token_type": "bearer"}, status_code=status.HTTP_200_OK)
 
@@ -43,35 +59,34 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_s
 
 @auth_router.post("/logout", status_code=status.HTTP_200_OK)
 async def logout(token: str, db: AsyncSession = Depends(get_async_session)):
-    blacklisted_token = await db.execute(BlacklistedToken.select().where(token=token).first())
-
-    if blacklisted_token:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="Token allaqachon qora ro'yxatga kiritilgan")
-
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Noto'g'ri token",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        token_data, _ = verify_access_token(token, credentials_exception, db)
-        user = await get_user_by_phone_number(db, token_data.phone_number)
+    payload = decode_access_token(token, credentials_exception)
+    jti = token_id(payload, token)
 
-        if user is None:
-            raise credentials_exception
+    if revocation_store.is_revoked(jti):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Token allaqachon qora ro'yxatga kiritilgan")
 
-        if user.is_active:
-            await update_user_inactive_status(db, user)
-            db.add(BlacklistedToken(token=token))
-            await db.commit()
-            return JSONResponse(content={"message": "Muvaffaqiyatli chiqish qilindi"}, status_code=status.HTTP_200_OK)
-        else:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                                detail="Foydalanuvchi allaqachon chiqish qilgan")
-    except HTTPException as e:
-        raise e
+    user = await get_user_by_phone_number(db, payload.get("phone_number"))
+    if user is None:
+        raise credentials_exception
+
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Foydalanuvchi allaqachon chiqish qilgan")
+
+    await update_user_inactive_status(db, user)
+    db.add(BlacklistedToken(token=token, jti=jti, expires_at=datetime.utcfromtimestamp(payload["exp"])))
+    await db.commit()
+
+    revocation_store.add(jti, payload["exp"])
+    invalidate_token(token)
+    return JSONResponse(content={"message": "Muvaffaqiyatli chiqish qilindi"}, status_code=status.HTTP_200_OK)
 
 
 @auth_router.get("/me", response_model=UserMe, status_code=status.HTTP_200_OK)
@@ -103,7 +118,7 @@ async def create_superuser(username: int, password: str, db: AsyncSession = Depe
 
     if user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Superuser allaqachon mavjud")
-    hashed_password = get_password_hash(password)
+    hashed_password = await get_password_hash(password)
     new_user = User(
         phone_number=username,
         hashed_password=hashed_password,
@@ -1,21 +1,27 @@
-from fastapi import APIRouter, Depends, Form, HTTPException, UploadFile, File, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Form, HTTPException, UploadFile, File, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.bot.helper import clean_string
+from app.core.conditional import catalogue_conditional
 from app.core.config import settings
 from app.core.security import get_current_user
-from app.crud import get_categories, get_category, delete_category
-from app.database.base import get_async_session
+from app.crud import (
+    get_category, delete_category, get_categories_listing, invalidate_catalogue, update_image_variants,
+    release_image, store_image
+)
+from app.database.base import get_async_session, get_async_read_session
 from app.database.models import Category
+from app.database.sqlite import begin_write
 from app.schemas import CategoryListResponse, CategoryResponse, UserResponse
-from app.utils import save_image, is_valid_image
+from app.utils import is_valid_image
 
 category_router = APIRouter(prefix="/categories", tags=['Categories'])
 
 
 @category_router.post("/create", status_code=status.HTTP_201_CREATED)
 async def create_category_api(
+        background_tasks: BackgroundTasks,
         name: str = Form(...),
         image: UploadFile = File(...),
         db: AsyncSession = Depends(get_async_session),
@@ -27,7 +33,9 @@ async def create_category_api(
             detail="Noto'g'ri rasm. Ruxsat etilgan turlari: jpeg, png. Maksimal hajmi: 5 MB"
         )
 
-    file_location = await save_image(image, name=name, dir=settings.CATEGORY_DIR)
+    # Rasm yozuv commit bo'lguncha qulflanadi (store_image) - SQLite da bu yozish tranzaksiyasi
+    await begin_write(db)
+    file_location = await store_image(db, image, dir=settings.CATEGORY_DIR)
 
     db_category = Category(
         name=clean_string(name),
@@ -36,6 +44,8 @@ async def create_category_api(
     db.add(db_category)
     await db.commit()
     await db.refresh(db_category)
+    await invalidate_catalogue()
+    background_tasks.add_task(update_image_variants, Category, db_category.id, file_location)
 
     return JSONResponse(
         status_code=status.HTTP_201_CREATED,
@@ -43,14 +53,14 @@ async def create_category_api(
     )
 
 
-@category_router.get("/", response_model=CategoryListResponse, status_code=status.HTTP_200_OK)
-async def get_categories_api(db: AsyncSession = Depends(get_async_session)):
-    db_categories = await get_categories(db)
-    return {"categories": db_categories}
+@category_router.get("/", response_model=CategoryListResponse, status_code=status.HTTP_200_OK,
+                     dependencies=[Depends(catalogue_conditional)])
+async def get_categories_api(db: AsyncSession = Depends(get_async_read_session)):
+    return await get_categories_listing(db)
 
 
 @category_router.get("/{category_id}", response_model=CategoryResponse, status_code=status.HTTP_200_OK)
-async def get_category_api(category_id: int, db: AsyncSession = Depends(get_async_session)):
+async def get_category_api(category_id: int, db: AsyncSession = Depends(get_async_read_session)):
     db_category = await get_category(db, category_id)
     if not db_category:
         raise HTTPException(
@@ -63,6 +73,7 @@ async def get_category_api(category_id: int, db: AsyncSession = Depends(get_asyn
 @category_router.patch("/{category_id}", response_model=CategoryResponse, status_code=status.HTTP_200_OK)
 async def update_category_api(
         category_id: int,
+        background_tasks: BackgroundTasks,
         name: str = Form(None),
         image: UploadFile = File(None),
         db: AsyncSession = Depends(get_async_session)
@@ -74,20 +85,29 @@ async def update_category_api(
             detail=f"Kategoriya {category_id} topilmadi"
         )
 
+    old_image, old_variants = db_category.image_path, db_category.image_variants
     if image:
         if not is_valid_image(image):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Noto'g'ri rasm. Ruxsat etilgan turlari: jpeg, png. Maksimal hajmi: 5 MB"
             )
-        file_location = await save_image(image, name=db_category.name, dir=settings.CATEGORY_DIR)
+        # get_category o'z tranzaksiyasini yopgan - rasm yozuv commit bo'lguncha qulflanadi
+        await begin_write(db)
+        file_location = await store_image(db, image, dir=settings.CATEGORY_DIR)
         db_category.image_path = file_location
+        db_category.image_variants = None
+        background_tasks.add_task(update_image_variants, Category, db_category.id, file_location)
 
     if name:
         db_category.name = clean_string(name)
 
     await db.commit()
     await db.refresh(db_category)
+    await invalidate_catalogue()
+
+    if old_image != db_category.image_path:
+        await release_image(old_image, old_variants)
 
     return db_category
 
@@ -100,6 +120,7 @@ async def delete_category_api(category_id: int, db: AsyncSession = Depends(get_a
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Kategoriya {category_id} topilmadi"
         )
+    await invalidate_catalogue()
     return JSONResponse(
         status_code=status.HTTP_204_NO_CONTENT,
         content={"message": f"Kategoriya {category_id} muvaffaqiyatli o'chirildi"}
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.core.media import media_files
+from app.core.ratelimit import rate_limit_stats
+from app.core.security import get_current_user, auth_cache_stats
+from app.crud.catalogue import catalogue_cache_stats
+from app.database.base import async_engine, read_engine
+from app.database.pool import pool_stats
+from app.schemas import UserResponse
+
+metrics_router = APIRouter(prefix="/metrics", tags=['Metrics'])
+
+
+@metrics_router.get("/cache", status_code=status.HTTP_200_OK)
+async def get_cache_metrics(current_user: UserResponse = Depends(get_current_user)):
+    if not current_user.is_stuff and not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden")
+
+    return {"catalogue": catalogue_cache_stats(), "auth": auth_cache_stats(), "rate_limit": rate_limit_stats(),
+            "media": media_files.stats()}
+
+
+@metrics_router.get("/pool", status_code=status.HTTP_200_OK)
+async def get_pool_metrics(current_user: UserResponse = Depends(get_current_user)):
+    if not current_user.is_stuff and not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden")
+
+    stats = {"database": pool_stats(async_engine.sync_engine.pool)}
+    if read_engine is not async_engine:
+        stats["replica"] = pool_stats(read_engine.sync_engine.pool)
+    return stats
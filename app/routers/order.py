@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.security import get_current_user
 from app.crud.order import create_order, get_orders, update_order, delete_order
-from app.database.base import get_async_session
+from app.database.base import get_async_session, get_async_read_session
 from app.schemas import OrderCreateSchema, OrderResponseSchema, OrdersResponseSchema, UserResponse
 
 order_router = APIRouter(tags=['Orders'], prefix="/orders")
@@ -15,7 +18,7 @@ async def create_order_api(
         db: AsyncSession = Depends(get_async_session),
         current_user: UserResponse = Depends(get_current_user)
 ):
-    if current_user.role == "admin":
+    if current_user.is_stuff or current_user.is_superuser:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin user can't add order")
 
     return await create_order(db, order_data, current_user)
@@ -23,10 +26,12 @@ async def create_order_api(
 
 @order_router.get("/", response_model=OrdersResponseSchema)
 async def read_orders_api(
-        db: AsyncSession = Depends(get_async_session),
+        limit: int = Query(settings.ORDER_PAGE_SIZE, ge=1, le=settings.ORDER_PAGE_SIZE_MAX),
+        cursor: Optional[int] = Query(None, description="Oldingi sahifaning next_cursor qiymati"),
+        db: AsyncSession = Depends(get_async_read_session),
         current_user: UserResponse = Depends(get_current_user)
 ):
-    return await get_orders(db, current_user)
+    return await get_orders(db, current_user, limit=limit, cursor=cursor)
 
 
 @order_router.put("/{order_id}", response_model=OrderResponseSchema)
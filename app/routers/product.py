@@ -1,24 +1,35 @@
-from aiogram.types import FSInputFile
-from fastapi import APIRouter, Depends, Form, UploadFile, File, status, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Form, UploadFile, File, Query, status, HTTPException
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from app.bot import bot
-from app.bot.helper import clean_string
+from app.bot.helper import clean_string, telegram_photo
+from app.core.conditional import catalogue_conditional
 from app.core.config import settings
 from app.core.security import get_current_user
-from app.crud.product import get_all_products, get_product, delete_product, get_top_rated_products
-from app.database.base import get_async_session
+from app.crud.catalogue import (
+    get_products_listing, get_product_detail, get_top_rated_listing, invalidate_catalogue, update_image_variants
+)
+from app.crud.media import release_image, store_image
+from app.crud.product import get_product, delete_product, parse_product_fields
+from app.database.base import get_async_session, get_async_read_session
 from app.database.models import Category, Product
+from app.database.sqlite import begin_write
 from app.schemas import UserResponse, ProductListResponse, ProductResponse
-from app.utils import is_valid_image, save_image
+from app.utils import is_valid_image
 
 product_router = APIRouter(prefix="/products", tags=['Mahsulotlar'])
 
+FIELDS_QUERY = Query(None, description="Vergul bilan ajratilgan maydonlar yoki 'summary'")
+INCLUDE_QUERY = Query(None, description="Yuklanadigan bog'lanishlar: category, reviews")
+
 
 @product_router.post("/create", status_code=status.HTTP_201_CREATED)
 async def create_product_api(
+        background_tasks: BackgroundTasks,
         name: str = Form(...),
         description: str = Form(default="Tavsif yo'q"),
         type: str = Form(...),
@@ -30,6 +41,9 @@ async def create_product_api(
         db: AsyncSession = Depends(get_async_session),
         current_user: UserResponse = Depends(get_current_user)
 ):
+    # Rasm yozuv commit bo'lguncha qulflanadi (store_image) - SQLite da bu yozish tranzaksiyasi
+    await begin_write(db)
+
     # Validate category
     db_category = await db.execute(select(Category).filter(Category.id == category_id))
     db_category = db_category.scalar_one_or_none()
@@ -44,7 +58,7 @@ async def create_product_api(
         )
 
     # Save image
-    file_location = await save_image(image, name=name, dir=settings.PRODUCT_DIR)
+    file_location = await store_image(db, image, dir=settings.PRODUCT_DIR)
 
     # Calculate discounted price
     discounted_price = price - (price * discount / 100)
@@ -64,10 +78,13 @@ async def create_product_api(
     db.add(db_product)
     await db.commit()
     await db.refresh(db_product)
+    await invalidate_catalogue()
+    # Thumbnail va medium variantlar javobdan keyin jarayonlar poolida yaratiladi
+    background_tasks.add_task(update_image_variants, Product, db_product.id, file_location)
 
     # Send image to Telegram
     try:
-        telegram_image = FSInputFile(path=db_product.image)
+        telegram_image = await telegram_photo(db_product.image)
         response = await bot.send_photo(
             chat_id=settings.OWNER_ID, photo=telegram_image,
             caption=f"Mahsulot qo'shildi!!!\nMahsulot id: {db_product.id}\nMahsulot nomi: {db_product.name}"
@@ -77,6 +94,7 @@ async def create_product_api(
         db.add(db_product)
         await db.commit()
         await db.refresh(db_product)
+        await invalidate_catalogue()
     except Exception as e:
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -89,15 +107,37 @@ async def create_product_api(
     )
 
 
-@product_router.get("/", response_model=ProductListResponse, status_code=status.HTTP_200_OK)
-async def get_all_products_api(db: AsyncSession = Depends(get_async_session)):
-    products = await get_all_products(db)
-    return {"products": products}
+@product_router.get("/", response_model=ProductListResponse, response_model_exclude_unset=True,
+                    status_code=status.HTTP_200_OK, dependencies=[Depends(catalogue_conditional)])
+async def get_all_products_api(
+        limit: int = Query(settings.PRODUCT_PAGE_SIZE, ge=1, le=settings.PRODUCT_PAGE_SIZE_MAX),
+        cursor: Optional[int] = Query(None, description="Oldingi sahifaning next_cursor qiymati"),
+        category_id: Optional[int] = None,
+        type: Optional[str] = None,
+        min_price: Optional[float] = Query(None, ge=0),
+        max_price: Optional[float] = Query(None, ge=0),
+        fields: Optional[str] = FIELDS_QUERY,
+        include: Optional[str] = INCLUDE_QUERY,
+        db: AsyncSession = Depends(get_async_read_session)
+):
+    # Ro'yxatda sharhlar default holatda yuborilmaydi, ular /review/product/{id} orqali olinadi
+    fields, include = parse_product_fields(fields, include, default_include=("category",))
+    return await get_products_listing(
+        db, fields, include, limit=limit, cursor=cursor, category_id=category_id, type=type,
+        min_price=min_price, max_price=max_price
+    )
 
 
-@product_router.get("/view/{product_id}", response_model=ProductResponse)
-async def read_product(product_id: int, db: AsyncSession = Depends(get_async_session)):
-    db_product = await get_product(product_id, db)
+@product_router.get("/view/{product_id}", response_model=ProductResponse, response_model_exclude_unset=True,
+                    dependencies=[Depends(catalogue_conditional)])
+async def read_product(
+        product_id: int,
+        fields: Optional[str] = FIELDS_QUERY,
+        include: Optional[str] = INCLUDE_QUERY,
+        db: AsyncSession = Depends(get_async_read_session)
+):
+    fields, include = parse_product_fields(fields, include)
+    db_product = await get_product_detail(db, product_id, fields, include)
     if db_product is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Mahsulot topilmadi")
     return db_product
@@ -106,6 +146,7 @@ async def read_product(product_id: int, db: AsyncSession = Depends(get_async_ses
 @product_router.patch("/{product_id}", status_code=status.HTTP_200_OK)
 async def update_product_api(
         product_id: int,
+        background_tasks: BackgroundTasks,
         name: str = Form(None),
         description: str = Form(None),
         type: str = Form(None),
@@ -117,6 +158,10 @@ async def update_product_api(
         db: AsyncSession = Depends(get_async_session),
         current_user: UserResponse = Depends(get_current_user)
 ):
+    if image:
+        # Rasm yozuv commit bo'lguncha qulflanadi (store_image) - SQLite da bu yozish tranzaksiyasi
+        await begin_write(db)
+
     # Fetch the product
     db_product = await get_product(product_id, db)
     if not db_product:
@@ -149,28 +194,37 @@ async def update_product_api(
         db_product.price = price - (price * discount / 100)
 
     # Handle image update
+    old_image, old_variants = db_product.image, db_product.image_variants
     if image:
         if not is_valid_image(image):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Noto'g'ri rasm. Ruxsat etilgan turlar: jpeg, png. Maksimal hajmi: 5 MB"
             )
-        file_location = await save_image(image, name=db_product.name, dir=settings.PRODUCT_DIR)
+        file_location = await store_image(db, image, dir=settings.PRODUCT_DIR)
         db_product.image = file_location
-
-        # Send updated image to Telegram
-        telegram_image = FSInputFile(path=file_location)
-        response = await bot.send_photo(
-            chat_id=settings.OWNER_ID, photo=telegram_image,
-            caption=f"Mahsulot yangilandi!\nMahsulot id: {db_product.id}\nMahsulot nomi: {db_product.name}"
-        )
-        file_id = response.photo[-1].file_id
-        db_product.telegram_file_id = file_id
+        # Yangi variantlar tayyor bo'lguncha asl rasm ishlatiladi
+        db_product.image_variants = None
+        background_tasks.add_task(update_image_variants, Product, db_product.id, file_location)
 
     # Save changes to the database
     db.add(db_product)
     await db.commit()
     await db.refresh(db_product)
+    await invalidate_catalogue()
+
+    if old_image != db_product.image:
+        await release_image(old_image, old_variants)
+
+        # Send updated image to Telegram. Commit dan keyin - tashqi so'rov yozish qulfini ushlab turmaydi
+        telegram_image = await telegram_photo(db_product.image)
+        response = await bot.send_photo(
+            chat_id=settings.OWNER_ID, photo=telegram_image,
+            caption=f"Mahsulot yangilandi!\nMahsulot id: {db_product.id}\nMahsulot nomi: {db_product.name}"
+        )
+        db_product.telegram_file_id = response.photo[-1].file_id
+        await db.commit()
+        await invalidate_catalogue()
 
     return JSONResponse(
         status_code=status.HTTP_200_OK,
@@ -178,10 +232,15 @@ async def update_product_api(
     )
 
 
-@product_router.get("/recommends", response_model=ProductListResponse, status_code=status.HTTP_200_OK)
-async def get_recommendation_products(db: AsyncSession = Depends(get_async_session)):
-    products = await get_top_rated_products(db)
-    return {"products": products}
+@product_router.get("/recommends", response_model=ProductListResponse, response_model_exclude_unset=True,
+                    status_code=status.HTTP_200_OK, dependencies=[Depends(catalogue_conditional)])
+async def get_recommendation_products(
+        fields: Optional[str] = FIELDS_QUERY,
+        include: Optional[str] = INCLUDE_QUERY,
+        db: AsyncSession = Depends(get_async_read_session)
+):
+    fields, include = parse_product_fields(fields, include, default_include=("category",))
+    return await get_top_rated_listing(db, fields, include)
 
 
 @product_router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -189,6 +248,7 @@ async def delete_product_api(product_id: int, db: AsyncSession = Depends(get_asy
     success = await delete_product(product_id, db)
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Mahsulot topilmadi")
+    await invalidate_catalogue()
     return JSONResponse(
         status_code=status.HTTP_204_NO_CONTENT,
         content={"message": "Mahsulot muvaffaqiyatli o'chirildi"}
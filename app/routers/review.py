@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.core.config import settings
 from app.core.security import get_current_user
-from app.database.base import get_async_session
+from app.crud.catalogue import invalidate_catalogue
+from app.crud.review import create_review, get_product_reviews
+from app.database.base import get_async_session, get_async_read_session
 from app.database.models import Product, Review
-from app.schemas import ReviewCreate, ReviewResponse, UserResponse
+from app.database.sqlite import begin_write
+from app.schemas import ReviewCreate, ReviewResponse, ReviewListResponse, UserResponse
 
 review_router = APIRouter(prefix="/review", tags=['Mahsulotlar Sharhi'])
 
@@ -18,50 +24,47 @@ async def create_review_for_product(
         current_user: UserResponse = Depends(get_current_user)
 ) -> JSONResponse:
     # Joriy foydalanuvchi admin emasligini tekshirish
-    if current_user.is_staff or current_user.is_superuser:
+    if current_user.is_stuff or current_user.is_superuser:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin foydalanuvchilar sharh qoldirolmaydi")
 
-    db_product = await db.execute(select(Product).where(Product.id == review.product_id))
-    db_product = db_product.scalar_one_or_none()
-    if not db_product:
+    # Reytingni tekshirish
+    if review.rating < 0 or review.rating > 5:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Reyting 0 dan 5 gacha bo'lishi kerak")
+
+    # Tekshiruvlar va yozish bitta yozish tranzaksiyasida - parallel so'rov ikkinchi sharh qo'sha olmaydi
+    await begin_write(db)
+    db_product = await db.execute(select(Product.id).where(Product.id == review.product_id))
+    if db_product.scalar_one_or_none() is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Mahsulot topilmadi")
 
     # Foydalanuvchi mahsulotga sharh qoldirganligini tekshirish
-    existing_review = await db.execute(select(Review).where(
+    existing_review = await db.execute(select(Review.id).where(
         Review.user_id == current_user.id,
         Review.product_id == review.product_id
     ))
-    existing_review = existing_review.scalar_one_or_none()
-    if existing_review:
+    if existing_review.scalar_one_or_none() is not None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Siz bu mahsulot uchun sharh qoldirgansiz")
 
-    # Reytingni tekshirish
-    if review.rating < 0 or review.rating > 5:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Reyting 0 dan 5 gacha bo'lishi kerak")
+    # Sharh va mahsulot reytingi bitta tranzaksiyada saqlanadi
+    await create_review(db, review, current_user.id)
+    await invalidate_catalogue()
 
-    # Mahsulot uchun umumiy sharhlar sonini yangilash
-    db_product.total_review += 1
+    return JSONResponse(status_code=status.HTTP_201_CREATED, content={"message": "Sharh muvaffaqiyatli yaratildi"})
 
-    # Sharhni yaratish va ma'lumotlar bazasiga qo'shish
-    db_review = Review(
-        name=review.name,
-        product_id=review.product_id,
-        rating=review.rating,
-        comment=review.comment,
-        user_id=current_user.id
-    )
-    db.add(db_review)
-    await db.commit()
-    await db.refresh(db_review)
 
-    # Mahsulot uchun o'rtacha reytingni hisoblash va yangilash
-    reviews = await db.execute(select(Review).where(Review.product_id == review.product_id))
-    reviews = reviews.scalars().all()
-    if reviews:
-        total_rating = sum([r.rating for r in reviews])
-        avg_rating = round(total_rating / len(reviews), 3)
-        db_product.average_rating = avg_rating
-        await db.commit()
+@review_router.get("/product/{product_id}", response_model=ReviewListResponse, status_code=status.HTTP_200_OK)
+async def get_product_reviews_api(
+        product_id: int,
+        limit: int = Query(settings.REVIEW_PAGE_SIZE, ge=1, le=settings.REVIEW_PAGE_SIZE_MAX),
+        cursor: Optional[int] = Query(None, description="Oldingi sahifaning next_cursor qiymati"),
+        db: AsyncSession = Depends(get_async_read_session)
+):
+    reviews, next_cursor = await get_product_reviews(db, product_id, limit=limit, cursor=cursor)
 
-    return JSONResponse(status_code=status.HTTP_201_CREATED, content={"message": "Sharh muvaffaqiyatli yaratildi"})
+    if not reviews and cursor is None:
+        db_product = await db.execute(select(Product.id).where(Product.id == product_id))
+        if db_product.scalar_one_or_none() is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Mahsulot topilmadi")
+
+    return {"reviews": reviews, "next_cursor": next_cursor}
@@ -30,7 +30,7 @@ async def read_all_users_endpoint(skip: int = 0, limit: int = 100,
                                   current_user: UserResponse = Depends(
                                       get_current_user),
                                   db: AsyncSession = Depends(get_async_session)):
-    if not current_user.is_staff and not current_user.is_superuser:
+    if not current_user.is_stuff and not current_user.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden")
 
@@ -48,7 +48,7 @@ async def read_user_by_id_endpoint(user_id: int,
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    if current_user.id != db_user.id and not current_user.is_staff and not current_user.is_superuser:
+    if current_user.id != db_user.id and not current_user.is_stuff and not current_user.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden")
 
@@ -61,7 +61,7 @@ async def update_user_endpoint(user_id: int, user_update: UserUpdate,
                                    get_current_user),
                                db: AsyncSession = Depends(get_async_session)):
     db_user = await get_user_by_id(db, user_id)
-    if current_user.id != db_user.id and not current_user.is_staff and not current_user.is_superuser:
+    if current_user.id != db_user.id and not current_user.is_stuff and not current_user.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden")
 
@@ -75,7 +75,7 @@ async def delete_user_endpoint(user_id: int,
                                db: AsyncSession = Depends(get_async_session)):
     db_user = await get_user_by_id(db, user_id)
 
-    if current_user.id != db_user.id and not current_user.is_staff and not current_user.is_superuser:
+    if current_user.id != db_user.id and not current_user.is_stuff and not current_user.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden")
 
@@ -1,13 +1,24 @@
 
-from typing import List
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
 
+class ImageVariant(BaseModel):
+    width: int
+    webp: str
+    jpeg: str
+
+
+# Variant nomi (masalan thumb, medium) -> fayllar; variantlar fonda yaratiladi, shuning uchun bo'sh bo'lishi mumkin
+ImageVariants = Dict[str, ImageVariant]
+
+
 class CategoryResponse(BaseModel):
     id: int
     name: str
     image_path: str
+    image_variants: Optional[ImageVariants] = None
 
     class Config:
         from_attributes = True
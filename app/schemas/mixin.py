@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Optional
 from pydantic import BaseModel
 
 class Token(BaseModel):
@@ -8,6 +9,7 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     phone_number: int
+    jti: Optional[str] = None
 
 class Roles(str, Enum):
     admin = "admin"
@@ -1,7 +1,8 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import datetime
-from app.schemas import ProductResponse
+from app.database.models.order import OrderStatus
+from app.schemas import ProductSummaryResponse
 
 
 class OrderItemCreateSchema(BaseModel):
@@ -15,7 +16,8 @@ class OrderCreateSchema(BaseModel):
 
 class OrderItemSchema(BaseModel):
     quantity: int
-    product: ProductResponse
+    price: float
+    product: ProductSummaryResponse
 
     class Config:
         from_attributes = True
@@ -23,7 +25,7 @@ class OrderItemSchema(BaseModel):
 
 class OrderResponseSchema(BaseModel):
     id: int
-    status: str
+    status: OrderStatus
     total_price: float
     items: List[OrderItemSchema]
     created_at: datetime
@@ -35,3 +37,4 @@ class OrderResponseSchema(BaseModel):
 class OrdersResponseSchema(BaseModel):
     total_price: float
     orders: List[OrderResponseSchema]
+    next_cursor: Optional[int] = None
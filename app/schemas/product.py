@@ -3,28 +3,43 @@ from typing import List, Optional
 
 from pydantic import BaseModel
 
-from .category import CategoryResponse
+from .category import CategoryResponse, ImageVariants
 from .review import ReviewResponse
 
 
 class ProductResponse(BaseModel):
+    # `fields=` / `include=` so'rovlarida faqat tanlangan maydonlar to'ldiriladi
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    type: Optional[str] = None
+    price: Optional[float] = None
+    image: Optional[str] = None
+    image_variants: Optional[ImageVariants] = None
+    discount: Optional[float] = None
+    count_in_stock: Optional[int] = None
+    total_review: Optional[int] = None
+    average_rating: Optional[float] = None
+    created_at: Optional[datetime] = None
+    category: Optional[CategoryResponse] = None
+    reviews: Optional[List[ReviewResponse]] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ProductSummaryResponse(BaseModel):
     id: int
     name: str
-    description: str
-    type: str
-    price: int
+    price: float
     image: str
-    discount: int
-    count_in_stock: int
-    total_review: int
-    average_rating: int
-    created_at: datetime
-    category: CategoryResponse  # Update: category should be singular
-    reviews: List[ReviewResponse]
+    image_variants: Optional[ImageVariants] = None
+    average_rating: float
 
     class Config:
-        from_attributes: True
+        from_attributes = True
 
 
 class ProductListResponse(BaseModel):
     products: List[ProductResponse]
+    next_cursor: Optional[int] = None
@@ -1,5 +1,5 @@
 
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 from .user import UserResponse
@@ -25,3 +25,8 @@ class ReviewResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ReviewListResponse(BaseModel):
+    reviews: List[ReviewResponse]
+    next_cursor: Optional[int] = None
@@ -1,2 +1,4 @@
 from .save_image import *
-from .helper import *
\ No newline at end of file
+from .helper import *
+from .cache import *
+from .image_variants import *
@@ -3,7 +3,47 @@ def serialize_product(product):
         "id": product.id,
         "name": product.name,
         "image": product.image,
+        "image_variants": product.image_variants,
         "telegram_file_id": product.telegram_file_id,
         "price": product.price,
         "discount": product.discount
     }
+
+
+PRODUCT_FIELDS = (
+    "id", "name", "description", "type", "price", "image", "image_variants", "discount",
+    "count_in_stock", "total_review", "average_rating", "created_at",
+)
+# Ombor qoldig'i har buyurtmada o'zgaradi: u katalog keshi va ETag ga kirmaydi, faqat
+# `fields=` da so'ralganda har so'rovda bazadan olinadi
+STOCK_FIELD = "count_in_stock"
+PRODUCT_DEFAULT_FIELDS = tuple(field for field in PRODUCT_FIELDS if field != STOCK_FIELD)
+PRODUCT_SUMMARY_FIELDS = ("id", "name", "price", "image", "image_variants", "average_rating")
+PRODUCT_RELATIONS = ("category", "reviews")
+
+
+def serialize_product_fields(product, fields=PRODUCT_FIELDS, include=PRODUCT_RELATIONS):
+    data = {field: getattr(product, field) for field in fields}
+
+    if "category" in include:
+        category = product.category
+        data["category"] = {
+            "id": category.id,
+            "name": category.name,
+            "image_path": category.image_path,
+            "image_variants": category.image_variants
+        } if category else None
+
+    if "reviews" in include:
+        data["reviews"] = [
+            {
+                "id": review.id,
+                "rating": review.rating,
+                "comment": review.comment,
+                "name": review.name,
+                "created_at": review.created_at
+            }
+            for review in product.reviews
+        ]
+
+    return data
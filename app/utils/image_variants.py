@@ -0,0 +1,118 @@
+import asyncio
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.core.config import settings
+from app.core.storage import media_storage
+
+# format nomi -> (Pillow formati, kengaytma, Content-Type). webp asosiy, jpeg - webp ni qo'llamaydigan mijozlar uchun
+VARIANT_FORMATS = {
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+}
+
+
+def render_variants(data: bytes, sizes: dict, webp_quality: int, jpeg_quality: int, max_pixels: int) -> dict:
+    """
+    Alohida jarayonda ishlaydi: rasm baytlarini oladi va har bir o'lcham uchun kodlangan baytlarni qaytaradi.
+
+    Rasm eng katta variant o'lchamiga bir marta kichraytiriladi (JPEG da dekodlash paytida), qolgan
+    nusxalar shu kichik rasmdan olinadi - asl o'lchamdagi nusxalar xotirada yaratilmaydi.
+
+    :param data: Asl rasm.
+    :param sizes: Variant nomi -> eng uzun tomonining maksimal o'lchami (px).
+    :param max_pixels: Asl rasm piksellari chegarasi, oshsa ValueError.
+    :return: {variant: {"width": int, "webp": bytes, "jpeg": bytes}}
+    """
+    from PIL import Image, ImageOps
+
+    # Pillow ning standart chegarasi (~89 MP, faqat ogohlantirish) o'rniga aniq chegara
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    largest = max(sizes.values())
+
+    with Image.open(io.BytesIO(data)) as source:
+        if source.width * source.height > max_pixels:
+            raise ValueError(f"Image is too large: {source.width}x{source.height}")
+        # JPEG 1/2, 1/4 yoki 1/8 masshtabda dekodlanadi; boshqa formatlarda ta'sir qilmaydi
+        source.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(source)
+        # reducing_gap: avval butun karrali reduce(), keyin LANCZOS - tez va sifat saqlanadi
+        image.thumbnail((largest, largest), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        image = image.convert("RGBA")
+
+    # JPEG shaffoflikni qo'llamaydi - fon oq rangga bo'yaladi
+    flat = Image.new("RGB", image.size, "white")
+    flat.paste(image, mask=image.getchannel("A"))
+
+    variants = {}
+    for name, size in sizes.items():
+        webp = image.copy()
+        webp.thumbnail((size, size), Image.Resampling.LANCZOS)
+        jpeg = flat.copy()
+        jpeg.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+        webp_buffer = io.BytesIO()
+        webp.save(webp_buffer, "WEBP", quality=webp_quality, method=6)
+        jpeg_buffer = io.BytesIO()
+        jpeg.save(jpeg_buffer, "JPEG", quality=jpeg_quality, optimize=True, progressive=True)
+
+        variants[name] = {"width": webp.width, "webp": webp_buffer.getvalue(), "jpeg": jpeg_buffer.getvalue()}
+    return variants
+
+
+_pool = None
+_pool_pid = None
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool, _pool_pid
+
+    # preload_app bilan fork qilingan har bir worker o'z jarayonlar poolini ochadi
+    if _pool is None or _pool_pid != os.getpid():
+        # fork emas, spawn: worker da threadpool threadlari bor, ular ushlab turgan qulflar
+        # fork qilingan jarayonda hech qachon bo'shatilmaydi
+        _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        _pool_pid = os.getpid()
+    return _pool
+
+
+def shutdown_image_workers() -> None:
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def create_image_variants(path: str) -> Optional[dict]:
+    """
+    Rasmning kichraytirilgan variantlarini `media_storage` da asl fayl yoniga yozadi.
+
+    :param path: Asl rasm yo'li.
+    :return: {variant: {"width": int, "webp": yo'l, "jpeg": yo'l}}, SVG uchun None.
+    """
+    if path.lower().endswith(".svg"):
+        return None
+
+    data = await media_storage.read(path)
+    loop = asyncio.get_running_loop()
+    rendered = await loop.run_in_executor(
+        _executor(), render_variants, data, dict(settings.IMAGE_VARIANT_SIZES),
+        settings.IMAGE_WEBP_QUALITY, settings.IMAGE_JPEG_QUALITY, settings.IMAGE_MAX_PIXELS
+    )
+
+    base, _ = os.path.splitext(path)
+    variants = {}
+    for name, variant in rendered.items():
+        variants[name] = {"width": variant["width"]}
+        for fmt, (_, extension, content_type) in VARIANT_FORMATS.items():
+            location = f"{base}.{name}{extension}"
+            await media_storage.write(location, variant[fmt], content_type)
+            variants[name][fmt] = location
+    return variants
+
+
+def image_variant_paths(variants: Optional[dict]) -> list[str]:
+    if not variants:
+        return []
+    return [variant[fmt] for variant in variants.values() for fmt in VARIANT_FORMATS if fmt in variant]
@@ -1,35 +1,171 @@
+import hashlib
 import os
-import shutil
+import uuid
+from typing import NamedTuple, Optional
 
-from fastapi import HTTPException, UploadFile
+from PIL import Image, UnidentifiedImageError
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
+from app.core.storage import media_storage
 
+CHUNK_SIZE = 64 * 1024
+
+# Fayl turi mijoz yuborgan Content-Type dan emas, faylning boshidagi baytlardan aniqlanadi
+IMAGE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/svg+xml": ".svg",
+}
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if (text.startswith(b"<?xml") or text.startswith(b"<svg")) and b"<svg" in text:
+        return "image/svg+xml"
+    return None
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Rasm hajmi {settings.MAX_FILE_SIZE // (1024 * 1024)} MB dan oshmasligi kerak"
+    )
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _too_many_pixels() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Rasm o'lchami {settings.IMAGE_MAX_PIXELS // 1_000_000} megapikseldan oshmasligi kerak"
+    )
+
+
+def _check_pixels(path: str) -> None:
+    # Image.open faqat sarlavhani o'qiydi - piksellar dekodlanmaydi
+    try:
+        with Image.open(path) as image:
+            pixels = image.width * image.height
+    except Image.DecompressionBombError:
+        raise _too_many_pixels()
+    except (UnidentifiedImageError, OSError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Rasmni o'qib bo'lmadi")
+    if pixels > settings.IMAGE_MAX_PIXELS:
+        raise _too_many_pixels()
+
+
+def _write_chunk(file_object, digest, chunk: bytes) -> None:
+    # hashlib katta bloklarda GIL ni bo'shatadi - hash ham yozish bilan birga threadda hisoblanadi
+    digest.update(chunk)
+    file_object.write(chunk)
+
+
+class StagedImage(NamedTuple):
+    temp_path: str
+    location: str
+    content_type: str
+
+
+async def stage_image(image: UploadFile, dir: str) -> StagedImage:
+    """
+    Rasmni qismlarga bo'lib vaqtinchalik faylga yozadi: fayl to'liq xotiraga o'qilmaydi, yozish
+    threadpool da bajariladi va hajm chegarasi oshishi bilan yozish to'xtatiladi.
+
+    Fayl nomi - tarkibining sha256 hashi, shuning uchun bir xil rasmlar bir marta saqlanadi va
+    fayl yo'li hech qachon boshqa tarkibni ko'rsatmaydi.
+
+    :param image: Yuklangan rasm.
+    :param dir: Saqlanadigan papka.
+    :return: Vaqtinchalik fayl va uning saqlanadigan yo'li (S3 da obyekt kaliti).
+    """
+    if image.size is not None and image.size > settings.MAX_FILE_SIZE:
+        raise _too_large()
+
+    head = await image.read(CHUNK_SIZE)
+    content_type = sniff_image_type(head)
+    if content_type not in settings.ALLOWED_IMAGE_TYPE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Noto'g'ri rasm. Ruxsat etilgan turlari: jpeg, png, webp, svg"
+        )
+
+    temp_location = os.path.join(dir, f".upload-{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
 
-async def save_image(image: UploadFile, name: str, dir: str) -> str:
     try:
-        safe_name = name.strip().replace(" ", "_")
-        _, file_ext = os.path.splitext(image.filename)
-        file_ext = file_ext.replace(" ", "_")
-        file_location = os.path.join(dir, f"{safe_name}{file_ext}")
+        await run_in_threadpool(os.makedirs, dir, exist_ok=True)
+        file_object = await run_in_threadpool(open, temp_location, "wb")
+        try:
+            size = 0
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > settings.MAX_FILE_SIZE:
+                    raise _too_large()
+                await run_in_threadpool(_write_chunk, file_object, digest, chunk)
+                chunk = await image.read(CHUNK_SIZE)
+        finally:
+            await run_in_threadpool(file_object.close)
+
+        if content_type != "image/svg+xml":
+            # Kichik fayl ichida ulkan rasm bo'lishi mumkin - o'lcham variantlar yaratilishidan oldin tekshiriladi
+            await run_in_threadpool(_check_pixels, temp_location)
+
+        file_location = os.path.join(dir, f"{digest.hexdigest()}{IMAGE_EXTENSIONS[content_type]}")
+        return StagedImage(temp_location, file_location, content_type)
+    except HTTPException:
+        await run_in_threadpool(_remove, temp_location)
+        raise
+    except Exception as e:
+        await run_in_threadpool(_remove, temp_location)
+        raise HTTPException(
+            status_code=500, detail=f"Error saving image: {str(e)}"
+        )
 
-        os.makedirs(dir, exist_ok=True)
 
-        # Save the file
-        with open(file_location, "wb") as file_object:
-            shutil.copyfileobj(image.file, file_object)
+async def discard_staged_image(staged: StagedImage) -> None:
+    await run_in_threadpool(_remove, staged.temp_path)
 
-        return file_location
+
+async def store_staged_image(staged: StagedImage) -> str:
+    """Vaqtinchalik faylni `media_storage` ga (lokal disk yoki S3) topshiradi."""
+    try:
+        await media_storage.store_file(*staged)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error saving image: {str(e)}"
         )
+    return staged.location
+
+
+async def save_image(image: UploadFile, dir: str) -> str:
+    """
+    Rasmni saqlaydi va yo'lini qaytaradi. Fayl yozuvga bog'lanadigan bo'lsa
+    `app.crud.media.store_image` ishlatiladi - u parallel `release_image` dan himoyalaydi.
+    """
+    return await store_staged_image(await stage_image(image, dir))
 
 
 def is_valid_image(image: UploadFile) -> bool:
-    content = image.file.read()
-    image.file.seek(0, 0)
-    if len(content) > settings.MAX_FILE_SIZE:
+    """
+    Faylni o'qimasdan tezkor tekshiruv. Haqiqiy tur va hajm `save_image` da yozish paytida tekshiriladi.
+    """
+    if image.size is not None and image.size > settings.MAX_FILE_SIZE:
         return False
 
     if image.content_type not in settings.ALLOWED_IMAGE_TYPE:
@@ -1,7 +1,7 @@
 import os
 
 # bind = "0.0.0.0:8000"  # IP va port
-workers = 1           # Workerlar soni
+workers = int(os.getenv("WEB_CONCURRENCY", 1))  # Workerlar soni, DB pool ham shunga bo'linadi
 worker_class = "uvicorn.workers.UvicornWorker"  # Uvicorn worker
 timeout = 30           # Har bir worker uchun timeout
 loglevel = "info"     # Log darajasi
@@ -10,7 +10,11 @@ errorlog = "-"        # Xato logini stdout ga yo'naltirish
 keepalive = 5         # Xatolarni oldini olish uchun saqlash vaqti
 max_requests = 1000    # Har bir workerda maksimal so'rovlar
 max_requests_jitter = 100  # Max so'rovlar vaqti tasodifiy muqaddas so'rovlar
-preload_app = True    # Ilovani oldindan yuklash
+# Ilova master jarayonda bir marta import qilinadi, workerlar fork qilinadi. Modul darajasidagi
+# obyektlar (engine lar, invalidation_bus, rate_limit_backend, media_storage, media_files) importda
+# ulanish yoki fayl ochmaydi: ular startup hodisasida yoki birinchi so'rovda har bir workerda ochiladi,
+# engine pool lari esa fork dan keyin tozalanadi (app/database/base.py)
+preload_app = True
 
 # Qo'shimcha o'zgaruvchilar
 proc_name = "my_fastapi_app"  # Jarayon nomi
@@ -12,7 +12,8 @@ from app.core.config import settings
 config = context.config
 
 # Set SQLAlchemy URL
-config.set_main_option("sqlalchemy.url", settings.SQLALCHEMY_DATABASE_URL)
+# configparser "%" ni interpolyatsiya belgisi deb o'qiydi - parolda uchrashi mumkin
+config.set_main_option("sqlalchemy.url", settings.SQLALCHEMY_DATABASE_URL.replace("%", "%%"))
 
 # Setup logging configuration
 if config.config_file_name is not None:
@@ -0,0 +1,30 @@
+"""product listing indexes
+
+Revision ID: 3b9e1c7d2a41
+Revises: ff6d52e36f12
+Create Date: 2026-10-18 10:12:04.318802
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e1c7d2a41'
+down_revision: Union[str, None] = 'ff6d52e36f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_products_category_id_id', 'products', ['category_id', 'id'], unique=False)
+    op.create_index('ix_products_type_id', 'products', ['type', 'id'], unique=False)
+    op.create_index('ix_products_price_id', 'products', ['price', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_price_id', table_name='products')
+    op.drop_index('ix_products_type_id', table_name='products')
+    op.drop_index('ix_products_category_id_id', table_name='products')
@@ -0,0 +1,28 @@
+"""order history indexes
+
+Revision ID: 5d7a0b3e9f12
+Revises: 8c2f4e6a1d93
+Create Date: 2026-10-18 12:40:15.552079
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d7a0b3e9f12'
+down_revision: Union[str, None] = '8c2f4e6a1d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_orders_user_id_id', 'orders', ['user_id', 'id'], unique=False)
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_index('ix_orders_user_id_id', table_name='orders')
@@ -0,0 +1,35 @@
+"""password reset required
+
+Revision ID: 79325955b8b4
+Revises: f2a9c6d83e17
+Create Date: 2026-10-18 21:14:05.327760
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '79325955b8b4'
+down_revision: Union[str, None] = 'f2a9c6d83e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('password_reset_required', sa.Boolean(), server_default=sa.false(),
+                                     nullable=False))
+
+    # Bot orqali ro'yxatdan o'tganlarning bir qismida parol o'rniga "pwd_context.hash(password)" satri
+    # saqlangan - ularning haqiqiy paroli noma'lum. Ular yangi parol o'rnatishi kerak
+    op.execute(
+        "UPDATE users SET password_reset_required = TRUE, hashed_password = NULL "
+        "WHERE hashed_password = 'pwd_context.hash(password)'"
+    )
+
+
+def downgrade() -> None:
+    # O'chirilgan placeholder satrlar qaytarilmaydi - ular baribir hech qanday parolga mos kelmasdi
+    op.drop_column('users', 'password_reset_required')
@@ -0,0 +1,39 @@
+"""product rating sum
+
+Revision ID: 8c2f4e6a1d93
+Revises: 3b9e1c7d2a41
+Create Date: 2026-10-18 11:02:47.906115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2f4e6a1d93'
+down_revision: Union[str, None] = '3b9e1c7d2a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_reviews_product_id_id', 'reviews', ['product_id', 'id'], unique=False)
+
+    # Mavjud sharhlardan agregatlarni to'ldirish. SET ichida ustunlarning eski qiymatlari ko'rinadi,
+    # shuning uchun average_rating ham sharhlardan hisoblanadi: rating_sum / total_review, sharh bo'lmasa 0
+    op.execute(
+        "UPDATE products SET "
+        "rating_sum = COALESCE((SELECT SUM(reviews.rating) FROM reviews WHERE reviews.product_id = products.id), 0), "
+        "total_review = (SELECT COUNT(*) FROM reviews WHERE reviews.product_id = products.id), "
+        "average_rating = COALESCE(ROUND(CAST(("
+        "SELECT SUM(reviews.rating) * 1.0 / NULLIF(COUNT(*), 0) FROM reviews WHERE reviews.product_id = products.id"
+        ") AS NUMERIC), 3), 0)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reviews_product_id_id', table_name='reviews')
+    op.drop_column('products', 'rating_sum')
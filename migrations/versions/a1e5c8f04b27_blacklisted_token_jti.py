@@ -0,0 +1,34 @@
+"""blacklisted token jti
+
+Revision ID: a1e5c8f04b27
+Revises: 5d7a0b3e9f12
+Create Date: 2026-10-18 13:31:52.104776
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1e5c8f04b27'
+down_revision: Union[str, None] = '5d7a0b3e9f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('blacklisted_tokens', sa.Column('jti', sa.String(), nullable=True))
+    op.add_column('blacklisted_tokens', sa.Column('expires_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_blacklisted_tokens_jti'), 'blacklisted_tokens', ['jti'], unique=True)
+    op.create_index(op.f('ix_blacklisted_tokens_expires_at'), 'blacklisted_tokens', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_blacklisted_tokens_blacklisted_on'), 'blacklisted_tokens', ['blacklisted_on'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_blacklisted_tokens_blacklisted_on'), table_name='blacklisted_tokens')
+    op.drop_index(op.f('ix_blacklisted_tokens_expires_at'), table_name='blacklisted_tokens')
+    op.drop_index(op.f('ix_blacklisted_tokens_jti'), table_name='blacklisted_tokens')
+    op.drop_column('blacklisted_tokens', 'expires_at')
+    op.drop_column('blacklisted_tokens', 'jti')
@@ -0,0 +1,26 @@
+"""drop blacklisted token string index
+
+Revision ID: c47d2e9b8a15
+Revises: a1e5c8f04b27
+Create Date: 2026-10-18 14:05:38.660213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47d2e9b8a15'
+down_revision: Union[str, None] = 'a1e5c8f04b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_blacklisted_tokens_token', table_name='blacklisted_tokens')
+
+
+def downgrade() -> None:
+    op.create_index('ix_blacklisted_tokens_token', 'blacklisted_tokens', ['token'], unique=True)
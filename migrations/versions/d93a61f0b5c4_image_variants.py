@@ -0,0 +1,28 @@
+"""image variants
+
+Revision ID: d93a61f0b5c4
+Revises: c47d2e9b8a15
+Create Date: 2026-10-18 15:12:07.481926
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd93a61f0b5c4'
+down_revision: Union[str, None] = 'c47d2e9b8a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('image_variants', sa.JSON(), nullable=True))
+    op.add_column('categories', sa.Column('image_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('categories', 'image_variants')
+    op.drop_column('products', 'image_variants')
@@ -0,0 +1,41 @@
+"""order item unit price
+
+Revision ID: f2a9c6d83e17
+Revises: e4b7a2c91f60
+Create Date: 2026-10-18 19:26:40.118532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a9c6d83e17'
+down_revision: Union[str, None] = 'e4b7a2c91f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # order_items.price endi bir dona narxi. Eski REST buyurtmalarida u qator summasi (narx * miqdor)
+    # edi: bunday buyurtmalarda total_price = SUM(price), bot buyurtmalarida esa SUM(price * quantity).
+    # Barcha miqdorlar 1 bo'lsa ikkala ma'no bir xil - o'zgartirish kerak emas.
+    op.execute("""
+        UPDATE order_items
+        SET price = price / quantity
+        WHERE quantity > 1
+          AND order_id IN (
+              SELECT orders.id
+              FROM orders
+              JOIN order_items AS items ON items.order_id = orders.id
+              GROUP BY orders.id, orders.total_price
+              HAVING ABS(orders.total_price - SUM(items.price)) < 0.005
+                 AND ABS(orders.total_price - SUM(items.price * items.quantity)) >= 0.005
+          )
+    """)
+
+
+def downgrade() -> None:
+    # Qaysi qatorlar o'zgartirilgani saqlanmaydi - ma'lumotlar qaytarilmaydi
+    pass
@@ -0,0 +1,147 @@
+"""
+SQLite ga parallel yozish benchmarki: standart sozlamalar va app/database/sqlite.py dagi PRAGMA lar.
+
+Har bir jarayon gunicorn workerini taqlid qiladi: buyurtma tranzaksiyasi (qoldiqni o'qish,
+kamaytirish, buyurtma qo'shish), o'quvchi jarayonlar esa katalogni o'qiydi.
+
+    python scripts/bench_sqlite_writes.py --writers 4 --readers 4 --duration 5
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+TUNED_PRAGMAS = [
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("busy_timeout", 5000),
+    ("mmap_size", 256 * 1024 * 1024),
+    ("cache_size", -64_000),
+]
+
+# (PRAGMA lar, yozish tranzaksiyasini boshlash buyrug'i). O'quvchilar doim oddiy (DEFERRED) BEGIN bilan ishlaydi
+PROFILES = {
+    # sqlite3 standartlari: rollback journal, synchronous=FULL, 5 soniyalik timeout
+    "default": ([], "BEGIN"),
+    # Faqat PRAGMA lar: o'qib keyin yozadigan tranzaksiya WAL da SQLITE_BUSY_SNAPSHOT oladi
+    "wal": (TUNED_PRAGMAS, "BEGIN"),
+    # app.core.config dagi SQLITE_* qiymatlari: o'qishlar DEFERRED, buyurtma (begin_write) IMMEDIATE
+    "tuned": (TUNED_PRAGMAS, "BEGIN IMMEDIATE"),
+}
+
+
+def connect(path: str, profile: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, isolation_level=None)
+    for name, value in PROFILES[profile][0]:
+        connection.execute(f"PRAGMA {name}={value}")
+    return connection
+
+
+def setup(path: str, profile: str, products: int) -> None:
+    connection = connect(path, profile)
+    connection.executescript("""
+        CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, price REAL, stock INTEGER);
+        CREATE TABLE orders (id INTEGER PRIMARY KEY, product_id INTEGER, quantity INTEGER, created_at REAL);
+    """)
+    connection.executemany(
+        "INSERT INTO products (name, price, stock) VALUES (?, ?, ?)",
+        [(f"product {i}", 10.0 + i, 10 ** 9) for i in range(products)],
+    )
+    connection.close()
+
+
+def writer(path: str, profile: str, products: int, deadline: float, results) -> None:
+    connection = connect(path, profile)
+    begin = PROFILES[profile][1]
+    commits = errors = 0
+    i = os.getpid()
+    while time.time() < deadline:
+        product_id = i % products + 1
+        i += 7
+        try:
+            connection.execute(begin)
+            connection.execute("SELECT stock FROM products WHERE id = ?", (product_id,)).fetchone()
+            connection.execute("UPDATE products SET stock = stock - 1 WHERE id = ?", (product_id,))
+            connection.execute("INSERT INTO orders (product_id, quantity, created_at) VALUES (?, 1, ?)",
+                               (product_id, time.time()))
+            connection.execute("COMMIT")
+            commits += 1
+        except sqlite3.OperationalError:
+            # "database is locked" - so'rov foydalanuvchiga xato bo'lib qaytgan bo'lardi
+            errors += 1
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+    connection.close()
+    results.put(("writer", commits, errors))
+
+
+def reader(path: str, profile: str, deadline: float, results) -> None:
+    connection = connect(path, profile)
+    reads = errors = 0
+    while time.time() < deadline:
+        try:
+            # Ilovadagi sessiyalar kabi - har bir o'qish DEFERRED tranzaksiya ichida, yozish qulfisiz
+            connection.execute("BEGIN")
+            connection.execute("SELECT id, name, price FROM products ORDER BY id LIMIT 20").fetchall()
+            connection.execute("COMMIT")
+            reads += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+    connection.close()
+    results.put(("reader", reads, errors))
+
+
+def run(profile: str, writers: int, readers: int, duration: float, products: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.sqlite")
+        setup(path, profile, products)
+
+        results = multiprocessing.Queue()
+        deadline = time.time() + duration
+        processes = [multiprocessing.Process(target=writer, args=(path, profile, products, deadline, results))
+                     for _ in range(writers)]
+        processes += [multiprocessing.Process(target=reader, args=(path, profile, deadline, results))
+                      for _ in range(readers)]
+        for process in processes:
+            process.start()
+
+        totals = {"commits": 0, "write_errors": 0, "reads": 0, "read_errors": 0}
+        for _ in processes:
+            kind, done, errors = results.get()
+            if kind == "writer":
+                totals["commits"] += done
+                totals["write_errors"] += errors
+            else:
+                totals["reads"] += done
+                totals["read_errors"] += errors
+        for process in processes:
+            process.join()
+
+    totals["commits_per_sec"] = round(totals["commits"] / duration, 1)
+    totals["reads_per_sec"] = round(totals["reads"] / duration, 1)
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--profile", choices=[*PROFILES, "all"], default="all")
+    args = parser.parse_args()
+
+    profiles = list(PROFILES) if args.profile == "all" else [args.profile]
+    print(f"{'profile':<10}{'commits/s':>12}{'write errors':>14}{'reads/s':>12}{'read errors':>13}")
+    for profile in profiles:
+        totals = run(profile, args.writers, args.readers, args.duration, args.products)
+        print(f"{profile:<10}{totals['commits_per_sec']:>12}{totals['write_errors']:>14}"
+              f"{totals['reads_per_sec']:>12}{totals['read_errors']:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.crud.order import get_orders, merge_order_items, place_order
+from app.crud.product import get_products_page
+from app.crud.review import get_product_reviews
+from app.database.models import Category, Order, OrderItem, Product, Review, User
+
+pytestmark = pytest.mark.anyio
+
+
+async def seed(db, products: int = 5) -> tuple[User, list[Product]]:
+    user = User(chat_id=1, first_name="Test", phone_number=998901234567, hashed_password="x")
+    drinks = Category(name="Ichimliklar", image_path="media/category/a.jpg")
+    food = Category(name="Taomlar", image_path="media/category/b.jpg")
+    db.add_all([user, drinks, food])
+    await db.flush()
+
+    items = [
+        Product(name=f"Mahsulot {i}", description="", type="food" if i % 2 else "drink", price=10.0 * i,
+                discount=0, count_in_stock=10, image=f"media/product/{i}.jpg",
+                category_id=food.id if i % 2 else drinks.id)
+        for i in range(1, products + 1)
+    ]
+    db.add_all(items)
+    await db.commit()
+    return user, items
+
+
+async def stock(db, product_id: int) -> int:
+    return await db.scalar(select(Product.count_in_stock).where(Product.id == product_id))
+
+
+async def test_place_order_decrements_stock_and_stores_unit_prices(db):
+    user, products = await seed(db)
+    first, second = products[0], products[1]
+
+    quantities = merge_order_items([(first.id, 2), (second.id, 1), (first.id, 1)])
+    order = await place_order(db, user.id, quantities)
+
+    assert await stock(db, first.id) == 7
+    assert await stock(db, second.id) == 9
+    assert order.total_price == first.price * 3 + second.price
+
+    rows = (await db.execute(
+        select(OrderItem.product_id, OrderItem.quantity, OrderItem.price)
+        .where(OrderItem.order_id == order.id)
+        .order_by(OrderItem.product_id)
+    )).all()
+    assert [tuple(row) for row in rows] == [(first.id, 3, first.price), (second.id, 1, second.price)]
+
+
+async def test_place_order_rejects_insufficient_stock(db):
+    user, products = await seed(db)
+    # place_order xatoda rollback qiladi va obyektlarni eskirgan deb belgilaydi - id lar oldindan olinadi
+    user_id, first_id, second_id = user.id, products[0].id, products[1].id
+
+    with pytest.raises(HTTPException) as error:
+        await place_order(db, user_id, {first_id: 5, second_id: 11})
+
+    assert error.value.status_code == 400
+    assert await stock(db, first_id) == 10
+    assert await stock(db, second_id) == 10
+    assert await db.scalar(select(func.count()).select_from(Order)) == 0
+
+
+async def test_place_order_rejects_unknown_product(db):
+    user, products = await seed(db)
+    user_id, product_id = user.id, products[0].id
+
+    with pytest.raises(HTTPException) as error:
+        await place_order(db, user_id, {product_id: 1, 999: 1})
+
+    assert error.value.status_code == 404
+    assert await stock(db, product_id) == 10
+
+
+async def test_products_keyset_pagination(db):
+    _, products = await seed(db, products=7)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = await get_products_page(db, limit=3, cursor=cursor)
+        seen += [product.id for product in page]
+        if cursor is None:
+            break
+
+    assert seen == sorted((product.id for product in products), reverse=True)
+
+    page, cursor = await get_products_page(db, limit=10, type="food", min_price=20)
+    assert [product.id for product in page] == [products[6].id, products[4].id, products[2].id]
+    assert cursor is None
+
+
+async def test_reviews_keyset_pagination(db):
+    user, products = await seed(db, products=2)
+    reviews = [Review(name="Test", product_id=products[0].id, rating=5, comment=str(i), user_id=user.id)
+               for i in range(5)]
+    db.add_all(reviews + [Review(name="Test", product_id=products[1].id, rating=1, comment="", user_id=user.id)])
+    await db.commit()
+
+    first, cursor = await get_product_reviews(db, products[0].id, limit=3)
+    second, last_cursor = await get_product_reviews(db, products[0].id, limit=3, cursor=cursor)
+
+    assert [review.id for review in first + second] == sorted((review.id for review in reviews), reverse=True)
+    assert cursor == first[-1].id
+    assert last_cursor is None
+
+
+async def test_orders_keyset_pagination(db):
+    user, products = await seed(db)
+    orders = [await place_order(db, user.id, {products[i].id: 1}) for i in range(3)]
+    current_user = SimpleNamespace(id=user.id)
+
+    first = await get_orders(db, current_user, limit=2)
+    second = await get_orders(db, current_user, limit=2, cursor=first["next_cursor"])
+
+    assert [order.id for order in first["orders"]] == [orders[2].id, orders[1].id]
+    assert [order.id for order in second["orders"]] == [orders[0].id]
+    assert second["next_cursor"] is None
+    assert first["total_price"] == sum(product.price for product in products[:3])
+    assert first["orders"][0].items[0].product.id == products[2].id
@@ -0,0 +1,187 @@
+import os
+
+import pytest
+
+from app.core.storage import LocalStorageBackend, S3StorageBackend
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeClientError(Exception):
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class FakeBody:
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self) -> bytes:
+        return self.data
+
+
+class FakeS3Client:
+    """MinIO o'rnini bosuvchi: obyektlar va multipart yuklashlar xotirada."""
+
+    def __init__(self, fail_part: int = None):
+        self.objects = {}
+        self.uploads = {}
+        self.calls = []
+        self.fail_part = fail_part
+
+    async def head_object(self, Bucket, Key):
+        self.calls.append("head_object")
+        if (Bucket, Key) not in self.objects:
+            raise FakeClientError("404")
+        return {}
+
+    async def put_object(self, Bucket, Key, Body, ContentType, CacheControl):
+        self.calls.append("put_object")
+        self.objects[Bucket, Key] = {"body": Body, "content_type": ContentType, "cache_control": CacheControl}
+
+    async def create_multipart_upload(self, Bucket, Key, ContentType, CacheControl):
+        self.calls.append("create_multipart_upload")
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {"parts": {}, "content_type": ContentType, "cache_control": CacheControl}
+        return {"UploadId": upload_id}
+
+    async def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.calls.append("upload_part")
+        if PartNumber == self.fail_part:
+            raise FakeClientError("500")
+        self.uploads[UploadId]["parts"][PartNumber] = Body
+        return {"ETag": f'"{PartNumber}"'}
+
+    async def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.calls.append("complete_multipart_upload")
+        upload = self.uploads.pop(UploadId)
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        assert numbers == sorted(upload["parts"])
+        self.objects[Bucket, Key] = {
+            "body": b"".join(upload["parts"][number] for number in numbers),
+            "content_type": upload["content_type"],
+            "cache_control": upload["cache_control"],
+        }
+
+    async def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append("abort_multipart_upload")
+        self.uploads.pop(UploadId)
+
+    async def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise FakeClientError("NoSuchKey")
+        return {"Body": FakeBody(self.objects[Bucket, Key]["body"])}
+
+    async def delete_objects(self, Bucket, Delete):
+        self.calls.append("delete_objects")
+        assert len(Delete["Objects"]) <= 1000
+        for item in Delete["Objects"]:
+            self.objects.pop((Bucket, item["Key"]), None)
+
+    async def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"http://minio:9000/{Params['Bucket']}/{Params['Key']}?X-Amz-Expires={ExpiresIn}"
+
+
+def s3_backend(client: FakeS3Client, part_size: int = 4) -> S3StorageBackend:
+    backend = S3StorageBackend("media-bucket", part_size=part_size, url_expires=600)
+    backend._client = client
+    backend._client_error = FakeClientError
+    return backend
+
+
+def temp_file(tmp_path, data: bytes) -> str:
+    path = tmp_path / ".upload.part"
+    path.write_bytes(data)
+    return str(path)
+
+
+async def test_s3_small_file_is_put_in_one_request(tmp_path):
+    client = FakeS3Client()
+    backend = s3_backend(client, part_size=1024)
+    temp_path = temp_file(tmp_path, b"image")
+
+    await backend.store_file(temp_path, "media/product/a.jpg", "image/jpeg")
+
+    stored = client.objects["media-bucket", "media/product/a.jpg"]
+    assert stored["body"] == b"image"
+    assert stored["content_type"] == "image/jpeg"
+    assert "immutable" in stored["cache_control"]
+    assert client.calls == ["head_object", "put_object"]
+    assert not os.path.exists(temp_path)
+
+
+async def test_s3_large_file_is_uploaded_in_parts(tmp_path):
+    client = FakeS3Client()
+    backend = s3_backend(client, part_size=4)
+    temp_path = temp_file(tmp_path, b"0123456789")
+
+    await backend.store_file(temp_path, "media/product/b.png", "image/png")
+
+    assert client.objects["media-bucket", "media/product/b.png"]["body"] == b"0123456789"
+    assert client.calls.count("upload_part") == 3
+    assert client.calls[-1] == "complete_multipart_upload"
+    assert not os.path.exists(temp_path)
+
+
+async def test_s3_failed_part_aborts_upload(tmp_path):
+    client = FakeS3Client(fail_part=2)
+    backend = s3_backend(client, part_size=4)
+    temp_path = temp_file(tmp_path, b"0123456789")
+
+    with pytest.raises(FakeClientError):
+        await backend.store_file(temp_path, "media/product/c.png", "image/png")
+
+    assert client.calls[-1] == "abort_multipart_upload"
+    assert client.uploads == {}
+    assert ("media-bucket", "media/product/c.png") not in client.objects
+    assert not os.path.exists(temp_path)
+
+
+async def test_s3_existing_object_is_not_uploaded_again(tmp_path):
+    client = FakeS3Client()
+    backend = s3_backend(client)
+    await backend.write("media/product/d.jpg", b"old", "image/jpeg")
+    client.calls.clear()
+    temp_path = temp_file(tmp_path, b"same content")
+
+    await backend.store_file(temp_path, "media/product/d.jpg", "image/jpeg")
+
+    assert client.calls == ["head_object"]
+    assert not os.path.exists(temp_path)
+
+
+async def test_s3_read_delete_and_url():
+    client = FakeS3Client()
+    backend = s3_backend(client)
+    await backend.write("media/product/e.webp", b"webp", "image/webp")
+
+    assert await backend.read("media/product/e.webp") == b"webp"
+    assert await backend.url("media/product/e.webp") == (
+        "http://minio:9000/media-bucket/media/product/e.webp?X-Amz-Expires=600"
+    )
+
+    await backend.delete(["media/product/e.webp", "media/product/missing.jpg"])
+    assert client.objects == {}
+
+
+async def test_local_store_read_delete(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    backend = LocalStorageBackend()
+    temp_path = temp_file(tmp_path, b"image")
+
+    await backend.store_file(temp_path, "media/product/f.jpg", "image/jpeg")
+    await backend.write("media/product/f.thumb.webp", b"thumb", "image/webp")
+
+    assert await backend.read("media/product/f.jpg") == b"image"
+    assert await backend.url("media/product/f.jpg") == "/media/product/f.jpg"
+    assert not os.path.exists(temp_path)
+
+    await backend.delete(["media/product/f.jpg", "media/product/f.thumb.webp", "media/product/missing.jpg"])
+    assert os.listdir("media/product") == []